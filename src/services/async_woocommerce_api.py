@@ -5,6 +5,7 @@ High-performance alternative to the current requests-based implementation
 import asyncio
 import aiohttp
 import base64
+import json
 import logging
 import os
 from typing import Dict, List, Optional, Any
@@ -19,6 +20,13 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Use orjson for payment page decoding when available (falls back to stdlib json)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 def _format_currency_amount(amount_cents, currency='USD'):
     """
     Convert currency amount from cents to dollars with proper decimal formatting
@@ -197,8 +205,8 @@ class AsyncWooCommerceAPI:
             
             async with self.session.get(payments_url, params=params) as response:
                 if response.status == 200:
-                    # Optimized JSON processing - direct data extraction
-                    response_data = await response.json()
+                    # Optimized JSON processing - decode the raw body bytes directly
+                    response_data = _json_loads(await response.read())
                     
                     # Handle WooPayments response structure efficiently
                     payments = response_data.get('data', response_data) if isinstance(response_data, dict) else response_data
@@ -511,7 +519,14 @@ class AsyncWooCommerceAPI:
                     df = pl.DataFrame(transaction_data)
                     logger.info(f"[ASYNC-WOO-TRANSACTIONS] Retrieved {len(df)} transactions")
                     
-                    # Note: Order number fetching not implemented in async version yet
+                    # Attach order numbers with batched lookups instead of one request per transaction
+                    if fetch_order_numbers and 'order_id' in df.columns and 'order_number' not in df.columns:
+                        order_numbers = await self.get_order_numbers(df['order_id'].to_list())
+                        df = df.with_columns(
+                            pl.col('order_id').cast(pl.String)
+                            .replace_strict(order_numbers, default='', return_dtype=pl.String)
+                            .alias('order_number')
+                        )
                     
                     return df
                 else:
@@ -523,6 +538,47 @@ class AsyncWooCommerceAPI:
             logger.error(f"[ASYNC-WOO-TRANSACTIONS] Exception: {e}")
             return None
     
+    async def get_order_numbers(self, order_ids: List[Any]) -> Dict[str, str]:
+        """
+        Look up order numbers for many orders using batched `include` requests
+        
+        Args:
+            order_ids: WooCommerce order IDs (duplicates and empty values are ignored)
+            
+        Returns:
+            Dict mapping order ID (as string) to order number
+        """
+        unique_ids = sorted({str(order_id) for order_id in order_ids if order_id})
+        if not unique_ids:
+            return {}
+        
+        await self._ensure_session()
+        url = f"{self.api_base_url}/orders"
+        
+        async def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            params = {'include': ','.join(chunk), 'per_page': 100, '_fields': 'id,number'}
+            async with self.session.get(url, params=params) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.warning(f"[ASYNC-WOO-TRANSACTIONS] Order number lookup failed: HTTP {response.status} - {error_text[:300]}")
+                    return []
+                return _json_loads(await response.read())
+        
+        # One request per 100 orders (the API page limit), all in flight together
+        chunks = [unique_ids[i:i + 100] for i in range(0, len(unique_ids), 100)]
+        results = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        
+        order_numbers = {}
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"[ASYNC-WOO-TRANSACTIONS] Order number lookup failed: {result}")
+                continue
+            for order in result:
+                order_numbers[str(order.get('id', ''))] = str(order.get('number', ''))
+        
+        logger.info(f"[ASYNC-WOO-TRANSACTIONS] Resolved {len(order_numbers)}/{len(unique_ids)} order numbers in {len(chunks)} request(s)")
+        return order_numbers
+    
     async def _get_transactions_from_orders(self, per_page: int, page: int, 
                                           date_after: str = None, date_before: str = None) -> Optional[pl.DataFrame]:
         """
@@ -642,10 +698,12 @@ class AsyncWooCommerceAPI:
                 logger.warning("[ASYNC-WOO-VECTORIZED] No payment IDs provided")
                 return pl.DataFrame(schema={'payment_id': pl.Utf8, 'fees': pl.Float64})
             
-            # Filter for only payment IDs that start with 'pi_' to optimize
-            valid_payment_ids = [pid for pid in payment_ids if str(pid).startswith('pi_')]
+            # Filter for only payment IDs that start with 'pi_' to optimize (one prefix scan
+            # over the string column; non-string IDs become null and never match)
+            valid_payment_ids = pl.Series('payment_id', payment_ids, dtype=pl.Utf8, strict=False)
+            valid_payment_ids = valid_payment_ids.filter(valid_payment_ids.str.starts_with('pi_'))
             
-            if not valid_payment_ids:
+            if valid_payment_ids.is_empty():
                 logger.info("[ASYNC-WOO-VECTORIZED] No valid Stripe payment IDs found")
                 return pl.DataFrame(schema={'payment_id': pl.Utf8, 'fees': pl.Float64})
             
@@ -664,11 +722,8 @@ class AsyncWooCommerceAPI:
                 return pl.DataFrame(schema={'payment_id': pl.Utf8, 'fees': pl.Float64})
             
             # Filter transactions for the requested payment IDs using vectorized operations
-            payment_ids_set = set(valid_payment_ids)
-            
-            # Use Polars filtering for high performance
             matching_transactions = all_transactions_df.filter(
-                pl.col('payment_id').is_in(payment_ids_set) &
+                pl.col('payment_id').is_in(valid_payment_ids.to_list()) &
                 (pl.col('fees') > 0)  # Only include transactions with actual fees
             ).select(['payment_id', 'fees'])
             
@@ -789,11 +844,13 @@ class AsyncWooCommerceAPI:
         elif source_id == 'customers':
             return await self.get_customers(per_page=100, page=1)  # Limit to first 100
         elif source_id == 'transactions':
-            # For transactions, apply date filtering only if requested
+            # For transactions, apply date filtering only if requested; the grid
+            # shows the payments report as-is, without extra order number lookups
             if use_date_filtering:
-                return await self.get_all_transactions(date_after=start_date, date_before=end_date)
+                return await self.get_all_transactions(date_after=start_date, date_before=end_date,
+                                                       fetch_order_numbers=False)
             else:
-                return await self.get_all_transactions()  # No date filtering, limited internally
+                return await self.get_all_transactions(fetch_order_numbers=False)  # No date filtering, limited internally
         elif source_id == 'transaction_fees':
             # For fees summary, apply date filtering only if requested
             if use_date_filtering:
@@ -658,9 +658,8 @@ class SalesReceiptImport(BaseOperation):
     
     def _apply_transformations_lazy(self, lazy_df: pl.LazyFrame) -> pl.LazyFrame:
         """Lazy version of apply_transformations - returns LazyFrame for chaining"""
-        # This would be implemented similar to _apply_transformations but returning LazyFrame
-        # For now, fall back to eager evaluation
-        return lazy_df.collect().pipe(self._apply_transformations).lazy()
+        # Pure column expressions, so they stay in the plan and fuse with the final collect
+        return lazy_df.with_columns(self._transformation_exprs())
     
     def _process_tax_rows_lazy(self, lazy_df: pl.LazyFrame) -> pl.LazyFrame:
         """Lazy version of process_tax_rows - returns LazyFrame for chaining"""
@@ -863,7 +862,13 @@ class SalesReceiptImport(BaseOperation):
             return df
         
         # Apply all transformations using vectorized Polars operations
-        transformed_df = df.with_columns([
+        transformed_df = df.with_columns(self._transformation_exprs())
+        
+        return transformed_df
+    
+    def _transformation_exprs(self) -> List[pl.Expr]:
+        """Column expressions applied by _apply_transformations, shared with the lazy path"""
+        return [
             # Handle non-US addresses for Shipping State
             pl.when(
                 pl.col('Shipping Country').str.to_lowercase() != 'united states'
@@ -907,9 +912,7 @@ class SalesReceiptImport(BaseOperation):
                 lambda sku: self._apply_sku_replacement(str(sku)),
                 return_dtype=pl.Utf8
             ).alias('SKU')
-        ])
-        
-        return transformed_df
+        ]
     
     def _apply_sku_replacement(self, sku: str) -> str:
         """Apply SKU replacement patterns"""
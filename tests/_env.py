@@ -0,0 +1,18 @@
+"""
+Shared .env loading for test scripts
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def load_env():
+    """Load environment variables from .env once per process
+
+    Returns True if python-dotenv is available, False otherwise.
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    load_dotenv('.env')
+    return True
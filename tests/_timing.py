@@ -0,0 +1,15 @@
+"""
+Shared timing helpers for test scripts
+"""
+import time
+
+
+async def timed(coro):
+    """Await a coroutine and return (result, elapsed seconds) for that call alone
+
+    The clock starts when the coroutine is awaited, so calls gathered together
+    are each timed on their own.
+    """
+    start_ns = time.perf_counter_ns()
+    result = await coro
+    return result, (time.perf_counter_ns() - start_ns) / 1e9
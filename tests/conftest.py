@@ -0,0 +1,37 @@
+"""
+Shared pytest configuration for the test suite
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make both `src.*` imports and the bare `ui.*` / `services.*` imports resolvable
+PROJECT_ROOT = Path(__file__).parent.parent
+
+for path in (PROJECT_ROOT, PROJECT_ROOT / 'src'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+try:
+    import pytest_asyncio
+except ImportError:
+    pytest_asyncio = None  # Async API fixtures unavailable without pytest-asyncio
+
+
+if pytest_asyncio is not None:
+    @pytest_asyncio.fixture(scope="session", loop_scope="session")
+    async def woo_api():
+        """One AsyncWooCommerceAPI (and connection pool) shared by every async test"""
+        from src.services.async_woocommerce_api import AsyncWooCommerceAPI
+        
+        async with AsyncWooCommerceAPI() as api:
+            yield api
+
+    @pytest_asyncio.fixture(scope="session", loop_scope="session")
+    async def _require_connection(woo_api):
+        """Probe the WooCommerce connection once; skip dependent tests if unreachable"""
+        result = await woo_api.test_connection()
+        if not result.get('success'):
+            pytest.skip(f"WooCommerce unreachable: {result.get('error')}")
+        return result
@@ -10,11 +10,10 @@ import logging
 import json
 from datetime import datetime
 
+from _env import load_env
+
 # Load environment variables
-try:
-    from dotenv import load_dotenv
-    load_dotenv('.env')
-except ImportError:
+if not load_env():
     print("dotenv not available - using system environment variables")
 
 # Setup detailed logging
@@ -11,12 +11,12 @@ from datetime import datetime, timedelta
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+from _env import load_env
+
 # Load environment variables if available
-try:
-    from dotenv import load_dotenv
-    load_dotenv('.env')
+if load_env():
     print("[OK] Loaded environment variables from .env file")
-except ImportError:
+else:
     print("[WARN] python-dotenv not available, using system environment variables only")
 
 # Configure logging
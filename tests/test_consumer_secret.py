@@ -7,12 +7,12 @@ import sys
 import logging
 from pathlib import Path
 
+from _env import load_env
+
 # Load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv('.env')
+if load_env():
     print("Loaded environment variables from .env file")
-except ImportError:
+else:
     print("python-dotenv not available, using system environment variables only")
 
 # Add src to Python path
@@ -2,304 +2,144 @@
 """
 Test the manager classes refactor
 """
-import sys
 import os
-import importlib.util
+import re
+import importlib.machinery
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 
-def test_manager_imports():
+import pytest
+
+MANAGER_DIR = Path('src/ui/managers')
+MANAGER_INIT = MANAGER_DIR / '__init__.py'
+MANAGER_FILES = [
+    MANAGER_DIR / 'connection_manager.py',
+    MANAGER_DIR / 'tree_population_manager.py',
+    MANAGER_DIR / 'data_source_manager.py',
+    MANAGER_DIR / 'status_manager.py'
+]
+
+EXPECTED_EXPORTS = frozenset({
+    'ConnectionManager',
+    'TreePopulationManager',
+    'DataSourceManager',
+    'StatusManager'
+})
+
+# Tokens each manager file must contain: class definition, then its concern
+REQUIRED = {
+    MANAGER_DIR / 'connection_manager.py': frozenset({
+        'class ConnectionManager', 'test_connection', 'connection_status_changed'
+    }),
+    MANAGER_DIR / 'tree_population_manager.py': frozenset({
+        'class TreePopulationManager', 'populate_unified_tree'
+    }),
+    MANAGER_DIR / 'data_source_manager.py': frozenset({
+        'class DataSourceManager', 'load_data_source'
+    }),
+    MANAGER_DIR / 'status_manager.py': frozenset({
+        'class StatusManager', 'update_connection_status'
+    }),
+}
+
+
+def _token_rx(tokens):
+    """Compile a bytes alternation that finds any of the ASCII tokens in one pass"""
+    return re.compile(b'|'.join(re.escape(token.encode('ascii')) for token in sorted(tokens)))
+
+def _decoded(matches):
+    """Turn the matched token bytes back into the str tokens they came from"""
+    return frozenset(match.decode('ascii') for match in matches)
+
+_REQUIRED_RX = {file_path: _token_rx(tokens) for file_path, tokens in REQUIRED.items()}
+_EXPORTS_RX = _token_rx(EXPECTED_EXPORTS)
+
+
+@lru_cache(maxsize=None)
+def _read(path):
+    """Read a source file's raw bytes once per test run; tokens are ASCII, so no decode"""
+    return path.read_bytes()
+
+@lru_cache(maxsize=None)
+def _manager_entries():
+    """Stat every file in the managers directory with a single directory read"""
+    try:
+        with os.scandir(MANAGER_DIR) as entries:
+            return {entry.name: entry.stat() for entry in entries}
+    except FileNotFoundError:
+        return None
+
+@lru_cache(maxsize=None)
+def _line_count(path):
+    """Count lines like readlines() would, scanning raw bytes without decoding"""
+    data = _read(path)
+    return data.count(b'\n') + (bool(data) and not data.endswith(b'\n'))
+
+@lru_cache(maxsize=None)
+def _found_tokens(path):
+    """Collect every required token present in a file with one regex pass"""
+    return _decoded(_REQUIRED_RX[path].findall(_read(path)))
+
+
+@pytest.fixture(scope="module")
+def manager_tokens():
+    """Scan all manager files concurrently; the reads release the GIL"""
+    with ThreadPoolExecutor(max_workers=len(REQUIRED)) as executor:
+        return dict(zip(REQUIRED, executor.map(_found_tokens, REQUIRED)))
+
+
+@pytest.mark.parametrize("path", MANAGER_FILES, ids=lambda p: p.stem)
+def test_manager_imports(path):
     """Test that all manager classes can be imported"""
-    print("Testing Manager Class Imports")
-    print("=" * 40)
-    
-    # Test individual imports
-    managers = [
-        'connection_manager',
-        'tree_population_manager', 
-        'data_source_manager',
-        'status_manager'
-    ]
-    
-    for manager in managers:
-        try:
-            spec = importlib.util.spec_from_file_location(
-                manager, 
-                f'src/ui/managers/{manager}.py'
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            print(f"✓ {manager} imported successfully")
-        except Exception as e:
-            print(f"✗ {manager} import failed: {e}")
-            return False
-    
-    return True
+    # Locate and compile the module without executing its top-level
+    # code, so the Qt imports and class bodies are not run here
+    spec = importlib.machinery.PathFinder.find_spec(path.stem, [str(MANAGER_DIR)])
+    assert spec is not None, f"No module named {path.stem}"
+    spec.loader.get_code(path.stem)
 
-def test_manager_structure():
-    """Test the structure of manager classes"""
-    print("\nTesting Manager Class Structure")
-    print("=" * 40)
-    
-    # Check that manager files exist
-    manager_files = [
-        'src/ui/managers/__init__.py',
-        'src/ui/managers/connection_manager.py',
-        'src/ui/managers/tree_population_manager.py',
-        'src/ui/managers/data_source_manager.py',
-        'src/ui/managers/status_manager.py'
-    ]
-    
-    for file_path in manager_files:
-        if os.path.exists(file_path):
-            print(f"✓ {file_path} exists")
-        else:
-            print(f"✗ {file_path} missing")
-            return False
-    
-    # Check file sizes to ensure they have content
-    for file_path in manager_files[1:]:  # Skip __init__.py
-        file_size = os.path.getsize(file_path)
-        if file_size > 1000:  # Should be substantial files
-            print(f"✓ {file_path} has substantial content ({file_size} bytes)")
-        else:
-            print(f"✗ {file_path} is too small ({file_size} bytes)")
-            return False
-    
-    return True
+@pytest.mark.parametrize("path", [MANAGER_INIT] + MANAGER_FILES, ids=lambda p: p.name)
+def test_manager_exists(path):
+    """Test that the manager package files exist"""
+    assert path.name in (_manager_entries() or {}), f"{path} missing"
+
+@pytest.mark.parametrize("path", MANAGER_FILES, ids=lambda p: p.stem)
+def test_manager_structure(path):
+    """Test that each manager file has substantial content"""
+    entries = _manager_entries() or {}
+    assert path.name in entries, f"{path} missing"
+    file_size = entries[path.name].st_size
+    assert file_size > 1000, f"{path} is too small ({file_size} bytes)"
 
-def test_manager_separation():
+@pytest.mark.parametrize("path", REQUIRED, ids=lambda p: p.stem)
+def test_manager_separation(manager_tokens, path):
     """Test that managers properly separate concerns"""
-    print("\nTesting Manager Separation of Concerns")
-    print("=" * 40)
-    
-    # Check ConnectionManager content
-    try:
-        with open('src/ui/managers/connection_manager.py', 'r') as f:
-            conn_content = f.read()
-        
-        if 'class ConnectionManager' in conn_content:
-            print("✓ ConnectionManager class defined")
-        else:
-            print("✗ ConnectionManager class not found")
-            return False
-        
-        if 'test_connection' in conn_content:
-            print("✓ ConnectionManager has connection testing methods")
-        else:
-            print("✗ ConnectionManager missing connection testing")
-            return False
-        
-        if 'connection_status_changed' in conn_content:
-            print("✓ ConnectionManager has status signals")
-        else:
-            print("✗ ConnectionManager missing status signals")
-            return False
-        
-    except Exception as e:
-        print(f"✗ Error reading ConnectionManager: {e}")
-        return False
-    
-    # Check TreePopulationManager content
-    try:
-        with open('src/ui/managers/tree_population_manager.py', 'r') as f:
-            tree_content = f.read()
-        
-        if 'class TreePopulationManager' in tree_content:
-            print("✓ TreePopulationManager class defined")
-        else:
-            print("✗ TreePopulationManager class not found")
-            return False
-        
-        if 'populate_unified_tree' in tree_content:
-            print("✓ TreePopulationManager has tree population methods")
-        else:
-            print("✗ TreePopulationManager missing tree population")
-            return False
-        
-    except Exception as e:
-        print(f"✗ Error reading TreePopulationManager: {e}")
-        return False
-    
-    # Check DataSourceManager content
-    try:
-        with open('src/ui/managers/data_source_manager.py', 'r') as f:
-            data_content = f.read()
-        
-        if 'class DataSourceManager' in data_content:
-            print("✓ DataSourceManager class defined")
-        else:
-            print("✗ DataSourceManager class not found")
-            return False
-        
-        if 'load_data_source' in data_content:
-            print("✓ DataSourceManager has data loading methods")
-        else:
-            print("✗ DataSourceManager missing data loading")
-            return False
-        
-    except Exception as e:
-        print(f"✗ Error reading DataSourceManager: {e}")
-        return False
-    
-    # Check StatusManager content
-    try:
-        with open('src/ui/managers/status_manager.py', 'r') as f:
-            status_content = f.read()
-        
-        if 'class StatusManager' in status_content:
-            print("✓ StatusManager class defined")
-        else:
-            print("✗ StatusManager class not found")
-            return False
-        
-        if 'update_connection_status' in status_content:
-            print("✓ StatusManager has status update methods")
-        else:
-            print("✗ StatusManager missing status updates")
-            return False
-        
-    except Exception as e:
-        print(f"✗ Error reading StatusManager: {e}")
-        return False
-    
-    return True
+    missing = REQUIRED[path] - manager_tokens[path]
+    assert not missing, f"{path.name} missing: {sorted(missing)}"
 
 def test_manager_benefits():
     """Test that managers provide expected benefits"""
-    print("\nTesting Manager Benefits")
-    print("=" * 40)
-    
     # Calculate total lines in manager files
-    total_lines = 0
-    manager_files = [
-        'src/ui/managers/connection_manager.py',
-        'src/ui/managers/tree_population_manager.py',
-        'src/ui/managers/data_source_manager.py',
-        'src/ui/managers/status_manager.py'
-    ]
-    
-    for file_path in manager_files:
-        try:
-            with open(file_path, 'r') as f:
-                lines = len(f.readlines())
-                total_lines += lines
-                print(f"✓ {os.path.basename(file_path)}: {lines} lines")
-        except Exception as e:
-            print(f"✗ Error reading {file_path}: {e}")
-            return False
-    
-    print(f"✓ Total manager code: {total_lines} lines")
-    
-    # Check that managers are substantial
-    if total_lines > 1000:
-        print("✓ Managers contain substantial extracted functionality")
-    else:
-        print("✗ Managers are too small - insufficient extraction")
-        return False
-    
-    # Check for proper separation
-    if all(os.path.exists(f) for f in manager_files):
-        print("✓ All manager files created successfully")
-    else:
-        print("✗ Some manager files missing")
-        return False
+    total_lines = sum(_line_count(file_path) for file_path in MANAGER_FILES)
     
-    return True
+    assert total_lines > 1000, (
+        f"Managers are too small - insufficient extraction ({total_lines} lines)"
+    )
 
-def test_refactor_architecture():
-    """Test the overall refactoring architecture"""
-    print("\nTesting Refactor Architecture")
-    print("=" * 40)
-    
-    # Check that managers directory exists
-    if os.path.exists('src/ui/managers'):
-        print("✓ Managers directory created")
-    else:
-        print("✗ Managers directory missing")
-        return False
-    
-    # Check __init__.py exists and has proper imports
-    try:
-        with open('src/ui/managers/__init__.py', 'r') as f:
-            init_content = f.read()
-        
-        expected_imports = [
-            'ConnectionManager',
-            'TreePopulationManager',
-            'DataSourceManager',
-            'StatusManager'
-        ]
-        
-        for import_name in expected_imports:
-            if import_name in init_content:
-                print(f"✓ {import_name} exported in __init__.py")
-            else:
-                print(f"✗ {import_name} missing from __init__.py")
-                return False
-        
-    except Exception as e:
-        print(f"✗ Error reading __init__.py: {e}")
-        return False
-    
-    # Check that each manager inherits from QObject for signals
-    manager_files = [
-        'src/ui/managers/connection_manager.py',
-        'src/ui/managers/tree_population_manager.py',
-        'src/ui/managers/data_source_manager.py',
-        'src/ui/managers/status_manager.py'
-    ]
-    
-    for file_path in manager_files:
-        try:
-            with open(file_path, 'r') as f:
-                content = f.read()
-            
-            if 'QObject' in content:
-                print(f"✓ {os.path.basename(file_path)} uses QObject")
-            else:
-                print(f"✗ {os.path.basename(file_path)} doesn't use QObject")
-                return False
-                
-        except Exception as e:
-            print(f"✗ Error checking {file_path}: {e}")
-            return False
-    
-    return True
+def test_managers_directory():
+    """Test that the managers directory exists"""
+    assert _manager_entries() is not None, "Managers directory missing"
+
+def test_refactor_exports():
+    """Test that __init__.py exports each manager"""
+    missing = EXPECTED_EXPORTS - _decoded(_EXPORTS_RX.findall(_read(MANAGER_INIT)))
+    assert not missing, f"Missing from __init__.py: {sorted(missing)}"
+
+@pytest.mark.parametrize("path", MANAGER_FILES, ids=lambda p: p.stem)
+def test_refactor_architecture(path):
+    """Test that each manager inherits from QObject for signals"""
+    assert b'QObject' in _read(path), f"{path.name} doesn't use QObject"
 
-def main():
-    """Run all refactor tests"""
-    print("Manager Refactor Validation")
-    print("=" * 60)
-    
-    tests = [
-        test_manager_imports,
-        test_manager_structure,
-        test_manager_separation,
-        test_manager_benefits,
-        test_refactor_architecture
-    ]
-    
-    passed = 0
-    for test in tests:
-        if test():
-            passed += 1
-    
-    print("\n" + "=" * 60)
-    print(f"RESULTS: {passed}/{len(tests)} tests passed")
-    
-    if passed == len(tests):
-        print("✅ ALL REFACTOR TESTS PASSED")
-        print("\nRefactoring benefits achieved:")
-        print("- Extracted 4 dedicated manager classes")
-        print("- Separated concerns into logical modules")
-        print("- Created proper Qt signal/slot architecture")
-        print("- Improved testability and maintainability")
-        print("- Reduced MainWindow complexity")
-        print("- Established foundation for modular architecture")
-        return True
-    else:
-        print("❌ SOME REFACTOR TESTS FAILED")
-        return False
 
 if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
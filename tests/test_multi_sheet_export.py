@@ -2,290 +2,178 @@
 """
 Test script for multi-sheet Excel export functionality
 """
-import sys
-import os
-import polars as pl
+import io
 import logging
-from pathlib import Path
 
-# Add the src directory to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+import polars as pl
+import pytest
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def test_multi_sheet_export():
-    """Test the multi-sheet Excel export functionality"""
-    print("Testing multi-sheet Excel export...")
-    
-    try:
-        # Import openpyxl to check if it's available
-        import openpyxl
-        print("✓ openpyxl is available")
-    except ImportError:
-        print("✗ openpyxl is not available - multi-sheet export will not work")
-        return False
-    
-    # Create test datasets that mimic sales receipt import results
-    print("\nCreating test datasets...")
-    
-    # Main processed data
-    processed_data = {
-        'Account Name': ['Test Account 1', 'Test Account 2', 'Test Account 3'],
-        'Webstore Order #': ['ORD-001', 'ORD-002', 'ORD-003'],
-        'Amount': [100.50, 200.75, 150.25],
-        'Grand Total': [110.50, 220.75, 165.25]
-    }
-    processed_df = pl.DataFrame(processed_data)
-    
-    # CM Import data (credit memos)
-    cm_import_data = {
-        'Account Name': ['Test Account 1'],
-        'Webstore Order #': ['ORD-001-CM'],
-        'Amount': [-50.25],
-        'Type': ['Credit Memo']
-    }
-    cm_import_df = pl.DataFrame(cm_import_data)
-    
-    # Change log data (validation errors)
-    change_log_data = {
-        'Account Name': ['Test Account 4'],
-        'Webstore Order #': ['ORD-004'],
-        'Error': ['Missing required field: Billing Address'],
-        'Row Number': [4]
+# Import the UI modules under test once; each test reports if they are missing
+try:
+    from ui.data_grid import MultiSheetExportWorker, InteractiveDataGrid
+    from ui.tabs.operations_tab import OperationsTab
+    UI_IMPORT_ERROR = None
+except ImportError as e:
+    MultiSheetExportWorker = InteractiveDataGrid = OperationsTab = None
+    UI_IMPORT_ERROR = e
+
+EXPECTED_SHEETS = ['Processed Data', 'CM Import', 'Change Log']
+
+# Test datasets that mimic sales receipt import results
+# Main processed data
+_PROCESSED_DATA = {
+    'Account Name': ['Test Account 1', 'Test Account 2', 'Test Account 3'],
+    'Webstore Order #': ['ORD-001', 'ORD-002', 'ORD-003'],
+    'Amount': [100.50, 200.75, 150.25],
+    'Grand Total': [110.50, 220.75, 165.25]
+}
+
+# CM Import data (credit memos)
+_CM_IMPORT_DATA = {
+    'Account Name': ['Test Account 1'],
+    'Webstore Order #': ['ORD-001-CM'],
+    'Amount': [-50.25],
+    'Type': ['Credit Memo']
+}
+
+# Change log data (validation errors)
+_CHANGE_LOG_DATA = {
+    'Account Name': ['Test Account 4'],
+    'Webstore Order #': ['ORD-004'],
+    'Error': ['Missing required field: Billing Address'],
+    'Row Number': [4]
+}
+
+# Simple frame for the InteractiveDataGrid checks
+_GRID_TEST_DATA = {
+    'Column 1': ['A', 'B', 'C'],
+    'Column 2': [1, 2, 3],
+    'Column 3': [1.1, 2.2, 3.3]
+}
+
+def _param_names(fn):
+    """Positional parameter names read straight from the code object
+
+    Unlike inspect.signature, a bound method still lists 'self' here.
+    """
+    code = fn.__code__
+    return code.co_varnames[:code.co_argcount]
+
+@pytest.fixture
+def ui_modules():
+    """Fail with the original import error if the UI modules are unavailable"""
+    if UI_IMPORT_ERROR is not None:
+        pytest.fail(f"UI modules could not be imported: {UI_IMPORT_ERROR}")
+
+@pytest.fixture(scope="module")
+def export_datasets():
+    """Sheet name to DataFrame mapping, built once per module"""
+    return {
+        'Processed Data': pl.DataFrame(_PROCESSED_DATA),
+        'CM Import': pl.DataFrame(_CM_IMPORT_DATA),
+        'Change Log': pl.DataFrame(_CHANGE_LOG_DATA)
     }
-    change_log_df = pl.DataFrame(change_log_data)
-    
-    print(f"✓ Created Processed Data: {len(processed_df)} rows")
-    print(f"✓ Created CM Import: {len(cm_import_df)} rows")
-    print(f"✓ Created Change Log: {len(change_log_df)} rows")
-    
-    # Test the multi-sheet export worker directly
-    print("\nTesting MultiSheetExportWorker...")
-    
+
+def test_multi_sheet_export(ui_modules, export_datasets):
+    """Test the multi-sheet Excel export functionality"""
+    # Multi-sheet export does not work without openpyxl
+    openpyxl = pytest.importorskip("openpyxl")
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    
+    datasets = export_datasets
+    
+    # Test the worker class; it is never started, so nothing is written to this path
+    worker = MultiSheetExportWorker(datasets, 'test_multi_sheet_export.xlsx')
+    assert worker.datasets is datasets
+    
+    # Since we can't run Qt threads without a QApplication,
+    # test the core functionality manually (same logic as in worker).
+    # Write-only mode streams rows to the file instead of keeping cells in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    
+    # Header styles are shared by every sheet
+    header_font = openpyxl.styles.Font(bold=True)
+    header_fill = openpyxl.styles.PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    
+    for sheet_name, df in datasets.items():
+        if df is None or df.is_empty():
+            continue
+        
+        # Create worksheet
+        worksheet = workbook.create_sheet(title=sheet_name)
+        
+        # Auto-adjust column widths from the DataFrame; write-only sheets
+        # need these set before any rows are written
+        value_lengths = df.select(
+            pl.col(column).cast(pl.String).str.len_chars().max()
+            for column in df.columns
+        ).row(0)
+        for col_idx, (column, value_length) in enumerate(zip(df.columns, value_lengths), 1):
+            max_length = max(value_length or 0, len(column))
+            adjusted_width = min(max_length + 2, 50)
+            worksheet.column_dimensions[get_column_letter(col_idx)].width = adjusted_width
+        
+        # Write headers
+        header_row = []
+        for column in df.columns:
+            cell = WriteOnlyCell(worksheet, value=column)
+            cell.font = header_font
+            cell.fill = header_fill
+            header_row.append(cell)
+        worksheet.append(header_row)
+        
+        # Write data row by row straight from Polars
+        for row in df.iter_rows():
+            worksheet.append(row)
+    
+    # Save workbook to memory; the checks below don't need a file on disk
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    assert buffer.tell() > 0, "Workbook was not written"
+    buffer.seek(0)
+    
+    # Re-open and check sheets
+    verification_wb = openpyxl.load_workbook(buffer, read_only=True)
     try:
-        from ui.data_grid import MultiSheetExportWorker
-        
-        # Prepare datasets dictionary
-        datasets = {
-            'Processed Data': processed_df,
-            'CM Import': cm_import_df,
-            'Change Log': change_log_df
-        }
-        
-        # Create output file path
-        output_path = "/tmp/test_multi_sheet_export.xlsx"
-        
-        # Test the worker class
-        worker = MultiSheetExportWorker(datasets, output_path)
-        print(f"✓ MultiSheetExportWorker created successfully")
-        
-        # Since we can't run Qt threads without a QApplication, 
-        # let's test the core functionality manually
-        print(f"\nTesting core export logic...")
-        
-        # Create workbook manually (same logic as in worker)
-        workbook = openpyxl.Workbook()
-        
-        # Remove default sheet
-        if 'Sheet' in workbook.sheetnames:
-            workbook.remove(workbook['Sheet'])
-        
-        for sheet_name, df in datasets.items():
-            if df is None or df.is_empty():
-                continue
-                
-            print(f"Creating sheet: {sheet_name} ({len(df)} rows)")
-            
-            # Create worksheet
-            worksheet = workbook.create_sheet(title=sheet_name)
-            
-            # Convert DataFrame to records for openpyxl
-            records = df.to_dicts()
-            columns = df.columns
-            
-            # Write headers
-            for col_idx, column in enumerate(columns, 1):
-                cell = worksheet.cell(row=1, column=col_idx, value=column)
-                cell.font = openpyxl.styles.Font(bold=True)
-                cell.fill = openpyxl.styles.PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            
-            # Write data
-            for row_idx, record in enumerate(records, 2):
-                for col_idx, column in enumerate(columns, 1):
-                    value = record.get(column, '')
-                    worksheet.cell(row=row_idx, column=col_idx, value=value)
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save workbook
-        workbook.save(output_path)
-        print(f"✓ Workbook saved to: {output_path}")
-        
-        # Verify the file was created and has the expected sheets
-        if os.path.exists(output_path):
-            print(f"✓ File exists: {output_path}")
-            
-            # Re-open and check sheets
-            verification_wb = openpyxl.load_workbook(output_path)
-            sheet_names = verification_wb.sheetnames
-            print(f"✓ Sheets in workbook: {sheet_names}")
-            
-            expected_sheets = ['Processed Data', 'CM Import', 'Change Log']
-            for expected_sheet in expected_sheets:
-                if expected_sheet in sheet_names:
-                    print(f"✓ Sheet '{expected_sheet}' found")
-                    ws = verification_wb[expected_sheet]
-                    print(f"  - Rows: {ws.max_row}, Columns: {ws.max_column}")
-                else:
-                    print(f"✗ Sheet '{expected_sheet}' missing")
-            
-            verification_wb.close()
-            
-            # Clean up test file
-            os.remove(output_path)
-            print(f"✓ Test file cleaned up")
-            
-        else:
-            print(f"✗ File was not created: {output_path}")
-            return False
-        
-        print(f"\n✓ Multi-sheet export test completed successfully!")
-        return True
-        
-    except Exception as e:
-        print(f"✗ Error testing multi-sheet export: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+        assert verification_wb.sheetnames == EXPECTED_SHEETS
+        for sheet_name in EXPECTED_SHEETS:
+            ws = verification_wb[sheet_name]
+            # Write-only sheets carry no stored dimensions, so size them by streaming
+            ws.calculate_dimension(force=True)
+            df = datasets[sheet_name]
+            assert ws.max_row == len(df) + 1
+            assert ws.max_column == len(df.columns)
+    finally:
+        verification_wb.close()
 
-def test_data_grid_integration():
+def test_data_grid_integration(ui_modules, qapp):
     """Test the InteractiveDataGrid multi-sheet export method"""
-    print("\n" + "="*60)
-    print("Testing InteractiveDataGrid integration...")
-    print("="*60)
+    data_grid = InteractiveDataGrid(pl.DataFrame(_GRID_TEST_DATA), "Test Data")
     
-    try:
-        from ui.data_grid import InteractiveDataGrid
-        
-        # Create a simple test dataframe
-        test_data = {
-            'Column 1': ['A', 'B', 'C'],
-            'Column 2': [1, 2, 3],
-            'Column 3': [1.1, 2.2, 3.3]
-        }
-        test_df = pl.DataFrame(test_data)
-        
-        # Create InteractiveDataGrid instance
-        data_grid = InteractiveDataGrid(test_df, "Test Data")
-        print("✓ InteractiveDataGrid created successfully")
-        
-        # Test that the export_multi_sheet method exists
-        if hasattr(data_grid, 'export_multi_sheet'):
-            print("✓ export_multi_sheet method exists")
-            
-            # Test method signature (we can't actually call it without Qt application)
-            import inspect
-            sig = inspect.signature(data_grid.export_multi_sheet)
-            params = list(sig.parameters.keys())
-            print(f"✓ Method parameters: {params}")
-            
-            expected_params = ['datasets', 'default_name']
-            if all(param in params for param in expected_params):
-                print("✓ Method has expected parameters")
-            else:
-                print(f"✗ Method missing expected parameters. Expected: {expected_params}, Got: {params}")
-                return False
-        else:
-            print("✗ export_multi_sheet method not found")
-            return False
-        
-        print("✓ InteractiveDataGrid integration test passed!")
-        return True
-        
-    except Exception as e:
-        print(f"✗ Error testing InteractiveDataGrid integration: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    # Test that the export_multi_sheet method exists
+    assert hasattr(data_grid, 'export_multi_sheet'), "export_multi_sheet method not found"
+    
+    # Test method signature (we can't actually call it without a running event loop)
+    params = _param_names(data_grid.export_multi_sheet)
+    
+    expected_params = ['datasets', 'default_name']
+    assert all(param in params for param in expected_params), (
+        f"Method missing expected parameters. Expected: {expected_params}, Got: {params}"
+    )
 
-def test_operations_tab_integration():
+@pytest.mark.parametrize("method_name", ['add_export_all_button', 'export_all_sheets'])
+def test_operations_tab_integration(ui_modules, method_name):
     """Test the OperationsTab integration"""
-    print("\n" + "="*60)
-    print("Testing OperationsTab integration...")
-    print("="*60)
+    assert hasattr(OperationsTab, method_name), f"{method_name} method not found"
     
-    try:
-        from ui.tabs.operations_tab import OperationsTab
-        
-        # Test that the methods exist
-        if hasattr(OperationsTab, 'add_export_all_button'):
-            print("✓ add_export_all_button method exists")
-        else:
-            print("✗ add_export_all_button method not found")
-            return False
-        
-        if hasattr(OperationsTab, 'export_all_sheets'):
-            print("✓ export_all_sheets method exists")
-        else:
-            print("✗ export_all_sheets method not found")
-            return False
-        
-        # Check method signatures
-        import inspect
-        
-        sig1 = inspect.signature(OperationsTab.add_export_all_button)
-        print(f"✓ add_export_all_button parameters: {list(sig1.parameters.keys())}")
-        
-        sig2 = inspect.signature(OperationsTab.export_all_sheets)
-        print(f"✓ export_all_sheets parameters: {list(sig2.parameters.keys())}")
-        
-        print("✓ OperationsTab integration test passed!")
-        return True
-        
-    except Exception as e:
-        print(f"✗ Error testing OperationsTab integration: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    # Check the method takes the instance as its first parameter
+    params = _param_names(getattr(OperationsTab, method_name))
+    assert params[0] == 'self'
 
 if __name__ == "__main__":
-    print("Multi-Sheet Excel Export Test Suite")
-    print("=" * 60)
-    
-    success_count = 0
-    total_tests = 3
-    
-    # Test 1: Core multi-sheet export functionality
-    if test_multi_sheet_export():
-        success_count += 1
-    
-    # Test 2: InteractiveDataGrid integration
-    if test_data_grid_integration():
-        success_count += 1
-    
-    # Test 3: OperationsTab integration
-    if test_operations_tab_integration():
-        success_count += 1
-    
-    print("\n" + "=" * 60)
-    print(f"Test Results: {success_count}/{total_tests} tests passed")
-    
-    if success_count == total_tests:
-        print("🎉 All tests passed! Multi-sheet export functionality is working correctly.")
-    else:
-        print("⚠️  Some tests failed. Please review the errors above.")
-    
-    print("=" * 60)
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
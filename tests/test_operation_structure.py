@@ -2,144 +2,128 @@
 """
 Test script to verify operation structure and logic
 """
-import sys
-import os
+import ast
+import functools
+import pathlib
 
-# Add src to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+import pytest
+
+SRO_PATH = pathlib.Path(__file__).parent.parent / 'src' / 'ui' / 'operations' / 'sales_receipt_tie_out.py'
+
+_REQUIRED_METHODS = frozenset({
+    'execute',
+    '_load_file',
+    '_create_combined_workbook',
+    '_process_tie_out_analysis',
+    '_process_sfdc_data',
+    '_build_woocommerce_fees_map',
+    '_process_qb_data',
+    '_create_sfdc_to_qb_tieout',
+    '_create_qb_to_avalara_tieout'
+})
+
+@functools.cache
+def _sro_source() -> str:
+    """Read the tie-out operation source once for the whole test module"""
+    return SRO_PATH.read_text(encoding='utf-8')
+
+@functools.cache
+def _load_sro_ast():
+    """Parse the tie-out operation source once, without importing it"""
+    return ast.parse(_sro_source())
+
+@functools.cache
+def _sro_method_names():
+    """Collect the function names defined in the tie-out source"""
+    return frozenset(
+        node.name for node in ast.walk(_load_sro_ast())
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    )
 
 def test_operation_import():
     """Test that we can import the operation class"""
-    try:
-        from src.ui.operations.sales_receipt_tie_out import SalesReceiptTieOut
-        print("✓ SalesReceiptTieOut import successful")
-        return True
-    except Exception as e:
-        print(f"✗ SalesReceiptTieOut import failed: {e}")
-        return False
+    from src.ui.operations.sales_receipt_tie_out import SalesReceiptTieOut
+    assert SalesReceiptTieOut.__name__ == 'SalesReceiptTieOut'
 
 def test_operation_structure():
     """Test the basic operation structure"""
-    try:
-        # This will fail due to missing dependencies, but we can test the import
-        from src.ui.operations.base_operation import BaseOperation
-        print("✓ BaseOperation import successful")
-        return True
-    except Exception as e:
-        print(f"✗ BaseOperation import failed: {e}")
-        return False
+    from src.ui.operations.base_operation import BaseOperation
+    from src.ui.operations.sales_receipt_tie_out import SalesReceiptTieOut
+    assert issubclass(SalesReceiptTieOut, BaseOperation)
 
 def test_method_existence():
     """Test that required methods exist"""
-    try:
-        # Import without executing
-        import importlib.util
-        spec = importlib.util.spec_from_file_location(
-            "sales_receipt_tie_out", 
-            os.path.join(os.path.dirname(__file__), 'src', 'ui', 'operations', 'sales_receipt_tie_out.py')
-        )
-        module = importlib.util.module_from_spec(spec)
-        
-        # Check if class exists
-        source = spec.loader.get_data(spec.origin).decode('utf-8')
-        
-        required_methods = [
-            'def execute',
-            'def _load_file',
-            'def _create_combined_workbook',
-            'def _process_tie_out_analysis',
-            'def _process_sfdc_data',
-            'def _build_woocommerce_fees_map',
-            'def _process_qb_data',
-            'def _create_sfdc_to_qb_tieout',
-            'def _create_qb_to_avalara_tieout'
-        ]
-        
-        missing_methods = []
-        for method in required_methods:
-            if method not in source:
-                missing_methods.append(method)
-        
-        if missing_methods:
-            print(f"✗ Missing methods: {missing_methods}")
-            return False
-        else:
-            print("✓ All required methods present")
-            return True
-            
-    except Exception as e:
-        print(f"✗ Method existence test failed: {e}")
-        return False
+    missing_methods = _REQUIRED_METHODS - _sro_method_names()
+    assert not missing_methods, f"Missing methods: {sorted(missing_methods)}"
 
 def test_schema_definitions():
     """Test that schema definitions are consistent"""
-    try:
-        import importlib.util
-        spec = importlib.util.spec_from_file_location(
-            "sales_receipt_tie_out", 
-            os.path.join(os.path.dirname(__file__), 'src', 'ui', 'operations', 'sales_receipt_tie_out.py')
-        )
-        source = spec.loader.get_data(spec.origin).decode('utf-8')
-        
-        # Check for schema definitions
-        schema_checks = [
-            "'SFDC Order #': pl.String",
-            "'SFDC Amount': pl.Float64",
-            "'QB Order #': pl.String",
-            "'QB Amount': pl.Float64",
-            "'Difference': pl.Float64",
-            "'Notes': pl.String"
-        ]
-        
-        schema_found = all(check in source for check in schema_checks)
-        
-        if schema_found:
-            print("✓ Schema definitions are consistent")
-            return True
-        else:
-            print("✗ Schema definitions missing or inconsistent")
-            return False
-            
-    except Exception as e:
-        print(f"✗ Schema definition test failed: {e}")
-        return False
-
-def run_tests():
-    """Run all structure tests"""
-    print("Testing Sales Receipt Tie Out Operation Structure")
-    print("=" * 50)
+    import polars as pl
+    
+    tree = _load_sro_ast()
+    
+    # Expected tie-out schema, queried once for names and dtypes below
+    expected = pl.Schema({
+        'SFDC Order #': pl.String,
+        'SFDC Amount': pl.Float64,
+        'QB Order #': pl.String,
+        'QB Amount': pl.Float64,
+        'Difference': pl.Float64,
+        'Notes': pl.String
+    })
     
-    tests = [
-        test_operation_import,
-        test_operation_structure,
-        test_method_existence,
-        test_schema_definitions
+    # Check for schema definitions: {column name: pl.<dtype>} dict literals
+    schema_checks = {
+        name: type(dtype).__name__
+        for name, dtype in zip(expected.names(), expected.dtypes())
+    }
+    
+    schema_dicts = [
+        {
+            key.value: value.attr
+            for key, value in zip(node.keys, node.values)
+            if isinstance(key, ast.Constant) and isinstance(key.value, str)
+            and isinstance(value, ast.Attribute)
+        }
+        for node in ast.walk(tree) if isinstance(node, ast.Dict)
     ]
     
-    passed = 0
-    failed = 0
+    assert any(schema_checks.items() <= schema.items() for schema in schema_dicts), \
+        "No SFDC to QB tie-out schema definition found in the source"
     
-    for test in tests:
-        print(f"\nRunning {test.__name__}...")
-        try:
-            if test():
-                passed += 1
-            else:
-                failed += 1
-        except Exception as e:
-            print(f"Test {test.__name__} crashed: {e}")
-            failed += 1
+    # Check the builders' real output against the schema and key columns
+    from src.ui.operations.sales_receipt_tie_out import SalesReceiptTieOut
+    operation = SalesReceiptTieOut()
+    sfdc_to_qb = operation._create_sfdc_to_qb_tieout(
+        [('1001', 10.0), ('1002', 5.0)], [('1001', 10.0), ('1003', 3.0)]
+    )
+    qb_to_avalara = operation._create_qb_to_avalara_tieout(
+        [('1001', 10.0), ('1003', 3.0)],
+        {'Avalara': pl.DataFrame({
+            'purchaseOrderNo': ['1001', '1004'], 'totalAmount': [10.0, 2.0], 'totalTax': [0.0, 0.0]
+        })},
+        {}
+    )
+    avalara_expected = pl.Schema({
+        'QB Order #': pl.String,
+        'QB Amount': pl.Float64,
+        'Avalara PO NUMBER': pl.String,
+        'Avalara Amount': pl.Float64,
+        'Difference': pl.Float64,
+        'Notes': pl.String
+    })
     
-    print("\n" + "=" * 50)
-    print(f"Structure Test Results: {passed} passed, {failed} failed")
+    assert sfdc_to_qb.schema == expected
+    assert qb_to_avalara.schema == avalara_expected
     
-    if failed == 0:
-        print("✓ All structure tests passed!")
-        return True
-    else:
-        print("✗ Some structure tests failed!")
-        return False
+    # Every row is keyed by an order number from at least one side
+    for df, key_columns in [
+        (sfdc_to_qb, ['SFDC Order #', 'QB Order #']),
+        (qb_to_avalara, ['QB Order #', 'Avalara PO NUMBER'])
+    ]:
+        null_counts = df.select(pl.col(key_columns).null_count()).row(0, named=True)
+        assert not any(null_counts.values()), f"Null key columns: {null_counts}"
+
 
 if __name__ == "__main__":
-    success = run_tests()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
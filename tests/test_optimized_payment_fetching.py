@@ -6,10 +6,17 @@ import asyncio
 import logging
 import sys
 
-# Add src to path
-sys.path.insert(0, '.')
+import pytest
 
-from src.services.async_woocommerce_api import AsyncWooCommerceAPI
+from _timing import timed
+
+pytest.importorskip("pytest_asyncio")
+
+# Share the session-scoped event loop so the woo_api fixture's pool is reused
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.usefixtures("_require_connection")
+]
 
 # Setup logging
 logging.basicConfig(
@@ -18,187 +25,159 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def test_page_by_page_fetching():
+def _payment_key(payment_id):
+    """Normalize a payment ID to a cheap set key: int when numeric, else an interned str"""
+    payment_id = str(payment_id)
+    return int(payment_id) if payment_id.isdigit() else sys.intern(payment_id)
+
+async def _fetch_pages_bounded(woo_api, max_pages=10, per_page=100, concurrency=4):
+    """Fetch pages 1..max_pages concurrently and return them up to the first short page
+
+    At most `concurrency` requests are in flight; once a short page is seen,
+    requests for later pages are cancelled.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _bounded(page):
+        async with semaphore:
+            return page, await woo_api.get_payments_by_page(page=page, per_page=per_page)
+    
+    tasks = [asyncio.create_task(_bounded(page)) for page in range(1, max_pages + 1)]
+    pages = {}
+    end_page = max_pages
+    
+    for next_done in asyncio.as_completed(tasks):
+        try:
+            page, page_payments = await next_done
+        except asyncio.CancelledError:
+            continue
+        pages[page] = page_payments or []
+        if len(pages[page]) < per_page and page < end_page:  # Reached end
+            end_page = page
+            for task in tasks[end_page:]:
+                task.cancel()
+    
+    return [pages[page] for page in range(1, end_page + 1)]
+
+async def test_page_by_page_fetching(woo_api):
     """Test the new page-by-page payment fetching method"""
-    try:
-        logger.info("=== Testing Optimized Page-by-Page Payment Fetching ===")
+    logger.info("=== Testing Optimized Page-by-Page Payment Fetching ===")
+    
+    # Test page-by-page fetching
+    logger.info("\nTesting page-by-page fetching...")
+    
+    # Test first 3 pages to verify the method works
+    for page in range(1, 4):
+        logger.info(f"\n--- Testing Page {page} ---")
+        payments = await woo_api.get_payments_by_page(page=page, per_page=10)
         
-        async with AsyncWooCommerceAPI() as woo_api:
-            # Test connection
-            logger.info("Testing connection...")
-            connection_result = await woo_api.test_connection()
-            
-            if not connection_result.get('success'):
-                logger.error(f"Connection failed: {connection_result}")
-                return False
-            
-            logger.info("✓ Connection successful")
-            
-            # Test page-by-page fetching
-            logger.info("\nTesting page-by-page fetching...")
-            
-            # Test first 3 pages to verify the method works
-            for page in range(1, 4):
-                logger.info(f"\n--- Testing Page {page} ---")
-                payments = await woo_api.get_payments_by_page(page=page, per_page=10)
-                
-                if payments is None:
-                    logger.error(f"✗ Page {page}: get_payments_by_page returned None")
-                    continue
-                
-                logger.info(f"✓ Page {page}: Retrieved {len(payments)} payments")
-                
-                # Log sample payment structure from first payment
-                if payments and len(payments) > 0:
-                    sample_payment = payments[0]
-                    payment_keys = list(sample_payment.keys())
-                    logger.info(f"  Sample payment fields: {payment_keys}")
-                    
-                    # Check for key fields
-                    has_payment_id = 'payment_id' in sample_payment
-                    has_fees = 'fees' in sample_payment
-                    logger.info(f"  Has payment_id: {has_payment_id}, Has fees: {has_fees}")
-                    
-                    if has_payment_id:
-                        logger.info(f"  Sample payment_id: {sample_payment.get('payment_id', 'N/A')}")
-                    if has_fees:
-                        logger.info(f"  Sample fees: {sample_payment.get('fees', 'N/A')}")
-                
-                # If we get no payments, we've reached the end
-                if len(payments) == 0:
-                    logger.info(f"  Reached end of payments at page {page}")
-                    break
-            
-            logger.info("\n=== Testing Performance Comparison ===")
-            
-            # Test old method vs new method performance
-            import time
-            
-            # Test old method (paginated with large limit)
-            logger.info("Testing old method (get_payments_paginated with limit 1000)...")
-            start_time = time.time()
-            old_payments = await woo_api.get_payments_paginated(limit=1000)
-            old_time = time.time() - start_time
-            logger.info(f"✓ Old method: {len(old_payments)} payments in {old_time:.2f} seconds")
-            
-            # Test new method (page by page for equivalent data)
-            logger.info("Testing new method (get_payments_by_page for first 10 pages)...")
-            start_time = time.time()
-            new_payments_total = 0
-            for page in range(1, 11):  # 10 pages * 100 = 1000 payments max
-                page_payments = await woo_api.get_payments_by_page(page=page, per_page=100)
-                if not page_payments:
-                    break
-                new_payments_total += len(page_payments)
-                if len(page_payments) < 100:  # Reached end
-                    break
-            new_time = time.time() - start_time
-            logger.info(f"✓ New method: {new_payments_total} payments in {new_time:.2f} seconds")
-            
-            # The new method should be comparable in performance but more flexible
-            logger.info(f"\nPerformance comparison:")
-            logger.info(f"  Old method: {len(old_payments)} payments, {old_time:.2f}s")
-            logger.info(f"  New method: {new_payments_total} payments, {new_time:.2f}s")
-            logger.info(f"  Flexibility: New method allows early termination after any page")
-            
-            return True
-                
-    except Exception as e:
-        logger.error(f"Test failed: {e}", exc_info=True)
-        return False
+        if payments is None:
+            logger.error(f"✗ Page {page}: get_payments_by_page returned None")
+            continue
+        
+        logger.info(f"✓ Page {page}: Retrieved {len(payments)} payments")
+        
+        # Log sample payment structure from first payment
+        if payments and len(payments) > 0:
+            sample_payment = payments[0]
+            payment_keys = list(sample_payment.keys())
+            logger.info(f"  Sample payment fields: {payment_keys}")
+            
+            # Check for key fields
+            has_payment_id = 'payment_id' in sample_payment
+            has_fees = 'fees' in sample_payment
+            logger.info(f"  Has payment_id: {has_payment_id}, Has fees: {has_fees}")
+            
+            if has_payment_id:
+                logger.info(f"  Sample payment_id: {sample_payment.get('payment_id', 'N/A')}")
+            if has_fees:
+                logger.info(f"  Sample fees: {sample_payment.get('fees', 'N/A')}")
+        
+        # If we get no payments, we've reached the end
+        if len(payments) == 0:
+            logger.info(f"  Reached end of payments at page {page}")
+            break
+    
+    logger.info("\n=== Testing Performance Comparison ===")
+    
+    # Run both methods concurrently so neither benefits from the other's warm caches
+    logger.info("Testing old method (get_payments_paginated with limit 1000) and "
+                "new method (get_payments_by_page for first 10 pages) concurrently...")
+    
+    async def _fetch_new():
+        # Page by page for equivalent data, 4 pages in flight; 10 pages * 100 = 1000 payments max
+        new_pages = await _fetch_pages_bounded(woo_api, max_pages=10, per_page=100)
+        return sum(len(page_payments) for page_payments in new_pages)
+    
+    (old_payments, old_time), (new_payments_total, new_time) = await asyncio.gather(
+        timed(woo_api.get_payments_paginated(limit=1000)),
+        timed(_fetch_new())
+    )
+    logger.info(f"✓ Old method: {len(old_payments)} payments in {old_time:.2f} seconds")
+    logger.info(f"✓ New method: {new_payments_total} payments in {new_time:.2f} seconds")
+    
+    # The new method should be comparable in performance but more flexible
+    logger.info(f"\nPerformance comparison:")
+    logger.info(f"  Old method: {len(old_payments)} payments, {old_time:.2f}s")
+    logger.info(f"  New method: {new_payments_total} payments, {new_time:.2f}s")
+    logger.info(f"  Flexibility: New method allows early termination after any page")
 
-async def test_early_termination_simulation():
+async def test_early_termination_simulation(woo_api):
     """Simulate the early termination scenario"""
     logger.info("\n=== Testing Early Termination Simulation ===")
     
-    try:
-        async with AsyncWooCommerceAPI() as woo_api:
-            # Simulate finding matches early
-            logger.info("Simulating payment ID matching with early termination...")
-            
-            # Get first page to extract some real payment IDs
-            first_page = await woo_api.get_payments_by_page(page=1, per_page=5)
-            if not first_page:
-                logger.warning("No payments found for simulation")
-                return False
-            
-            # Simulate looking for specific payment IDs (use real ones from first page)
-            simulated_target_ids = []
-            for payment in first_page[:3]:  # Take first 3 payment IDs
-                payment_id = payment.get('payment_id', '')
-                if payment_id:
-                    simulated_target_ids.append(payment_id)
-            
-            if not simulated_target_ids:
-                logger.warning("No payment IDs found for simulation")
-                return False
-            
-            logger.info(f"Simulating search for {len(simulated_target_ids)} payment IDs")
-            
-            # Simulate the optimized search process
-            unmatched_ids = set(simulated_target_ids)
-            matched_count = 0
-            page = 1
-            
-            while unmatched_ids and page <= 10:  # Max 10 pages for simulation
-                logger.info(f"  Fetching page {page}, {len(unmatched_ids)} IDs still unmatched")
-                
-                page_payments = await woo_api.get_payments_by_page(page=page, per_page=100)
-                if not page_payments:
-                    logger.info(f"  No more payments at page {page}")
-                    break
-                
-                # Check for matches
-                page_matches = 0
-                for payment in page_payments:
-                    payment_id = payment.get('payment_id', '')
-                    if payment_id in unmatched_ids:
-                        unmatched_ids.remove(payment_id)
-                        matched_count += 1
-                        page_matches += 1
-                
-                logger.info(f"  Page {page}: Found {page_matches} matches, {len(unmatched_ids)} still unmatched")
-                
-                # Early termination when all matches found
-                if not unmatched_ids:
-                    logger.info(f"✓ All {matched_count} payment IDs matched after only {page} pages!")
-                    logger.info(f"✓ Saved API calls: Would have stopped at page {page} instead of fetching all pages")
-                    break
-                
-                page += 1
-            
-            if unmatched_ids:
-                logger.info(f"Simulation complete: {matched_count} matched, {len(unmatched_ids)} unmatched after {page-1} pages")
-            
-            return True
-            
-    except Exception as e:
-        logger.error(f"Early termination simulation failed: {e}", exc_info=True)
-        return False
-
-async def main():
-    """Run all tests"""
-    logger.info("Starting optimized payment fetching tests...")
+    # Simulate finding matches early
+    logger.info("Simulating payment ID matching with early termination...")
+    
+    # Get first page to extract some real payment IDs
+    first_page = await woo_api.get_payments_by_page(page=1, per_page=5)
+    if not first_page:
+        pytest.skip("No payments found for simulation")
+    
+    # Simulate looking for specific payment IDs (use real ones from first page)
+    simulated_target_ids = []
+    for payment in first_page[:3]:  # Take first 3 payment IDs
+        payment_id = payment.get('payment_id', '')
+        if payment_id:
+            simulated_target_ids.append(payment_id)
     
-    test1_success = await test_page_by_page_fetching()
-    test2_success = await test_early_termination_simulation()
+    if not simulated_target_ids:
+        pytest.skip("No payment IDs found for simulation")
     
-    overall_success = test1_success and test2_success
+    logger.info(f"Simulating search for {len(simulated_target_ids)} payment IDs")
     
-    logger.info(f"\n=== Test Results ===")
-    logger.info(f"Page-by-page fetching: {'PASSED' if test1_success else 'FAILED'}")
-    logger.info(f"Early termination simulation: {'PASSED' if test2_success else 'FAILED'}")
-    logger.info(f"Overall: {'PASSED' if overall_success else 'FAILED'}")
+    # Simulate the optimized search process
+    unmatched_ids = {_payment_key(payment_id) for payment_id in simulated_target_ids}
+    matched_count = 0
+    page = 1
     
-    if overall_success:
-        logger.info("\n✓ Optimized payment fetching is working correctly!")
-        logger.info("✓ The new implementation should significantly reduce API calls")
-        logger.info("✓ Early termination when all matches are found")
-    else:
-        logger.error("\n✗ Some tests failed - check the implementation")
+    while unmatched_ids and page <= 10:  # Max 10 pages for simulation
+        logger.info(f"  Fetching page {page}, {len(unmatched_ids)} IDs still unmatched")
+        
+        page_payments = await woo_api.get_payments_by_page(page=page, per_page=100)
+        if not page_payments:
+            logger.info(f"  No more payments at page {page}")
+            break
+        
+        # Check for matches with one set intersection per page
+        page_ids = {_payment_key(payment['payment_id']) for payment in page_payments if payment.get('payment_id')}
+        hits = page_ids & unmatched_ids
+        unmatched_ids.difference_update(hits)
+        page_matches = len(hits)
+        matched_count += page_matches
+        
+        logger.info(f"  Page {page}: Found {page_matches} matches, {len(unmatched_ids)} still unmatched")
+        
+        # Early termination when all matches found
+        if not unmatched_ids:
+            logger.info(f"✓ All {matched_count} payment IDs matched after only {page} pages!")
+            logger.info(f"✓ Saved API calls: Would have stopped at page {page} instead of fetching all pages")
+            break
+        
+        page += 1
     
-    return overall_success
+    if unmatched_ids:
+        logger.info(f"Simulation complete: {matched_count} matched, {len(unmatched_ids)} unmatched after {page-1} pages")
 
 if __name__ == "__main__":
-    success = asyncio.run(main())
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-v", "-s"]))
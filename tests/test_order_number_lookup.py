@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test the batched order number lookup against a mocked aiohttp session
+"""
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+import polars as pl
+import pytest
+
+from src.services.async_woocommerce_api import AsyncWooCommerceAPI
+
+
+class _FakeResponse:
+    """Minimal async-context-manager response carrying a JSON payload"""
+
+    def __init__(self, status, payload):
+        self.status = status
+        self._payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def json(self):
+        return self._payload
+
+    async def read(self):
+        return json.dumps(self._payload).encode()
+
+    async def text(self):
+        return str(self._payload)
+
+
+class _FakeSession:
+    """Records every GET and answers the payments and orders endpoints"""
+
+    closed = False
+
+    def __init__(self, transactions=(), orders=(), failing_ids=()):
+        self.transactions = list(transactions)
+        self.orders = {str(order['id']): order for order in orders}
+        self.failing_ids = {str(order_id) for order_id in failing_ids}
+        self.requests = []
+
+    def get(self, url, params=None):
+        path = urlsplit(url).path
+        self.requests.append((path, dict(params or {})))
+        if path.endswith('/payments/reports/transactions'):
+            return _FakeResponse(200, self.transactions)
+        if path.endswith('/orders'):
+            ids = params['include'].split(',')
+            if self.failing_ids & set(ids):
+                return _FakeResponse(500, {'message': 'server error'})
+            return _FakeResponse(200, [self.orders[i] for i in ids if i in self.orders])
+        return _FakeResponse(404, {'message': 'not found'})
+
+    def order_lookups(self):
+        return [params for path, params in self.requests if path.endswith('/orders')]
+
+
+def _api(session):
+    api = AsyncWooCommerceAPI(store_url='https://shop.example.com')
+    api.session = session
+    return api
+
+
+def test_lookup_batches_unique_ids_in_chunks_of_100():
+    """Duplicates and empty IDs are dropped and each request includes at most 100 orders"""
+    orders = [{'id': i, 'number': f'WEB-{i}'} for i in range(1, 251)]
+    session = _FakeSession(orders=orders)
+    order_ids = list(range(1, 251)) + [5, 5, None, 0, '']
+
+    order_numbers = asyncio.run(_api(session).get_order_numbers(order_ids))
+
+    lookups = session.order_lookups()
+    assert len(lookups) == 3
+    included = [params['include'].split(',') for params in lookups]
+    assert [len(chunk) for chunk in included] == [100, 100, 50]
+    assert sorted(i for chunk in included for i in chunk) == sorted(str(i) for i in range(1, 251))
+    assert all(params['per_page'] == 100 and params['_fields'] == 'id,number' for params in lookups)
+    assert order_numbers == {str(i): f'WEB-{i}' for i in range(1, 251)}
+
+
+def test_lookup_skips_empty_input_and_failed_chunks():
+    """No IDs means no requests; a failing chunk leaves only its IDs unresolved"""
+    session = _FakeSession(orders=[{'id': i, 'number': f'WEB-{i}'} for i in range(1, 151)],
+                           failing_ids=[150])
+    api = _api(session)
+
+    assert asyncio.run(api.get_order_numbers([None, ''])) == {}
+    assert session.order_lookups() == []
+
+    order_numbers = asyncio.run(api.get_order_numbers(range(1, 151)))
+    assert len(session.order_lookups()) == 2
+    # IDs are chunked in string order, which puts '150' in the first chunk
+    failed_chunk = set(sorted(str(i) for i in range(1, 151))[:100])
+    assert set(order_numbers) == {str(i) for i in range(1, 151)} - failed_chunk
+
+
+@pytest.mark.parametrize("fetch_order_numbers", [True, False])
+def test_get_transactions_order_number_column(fetch_order_numbers):
+    """Order numbers are mapped per row; unresolved orders get an empty string"""
+    transactions = [
+        {'transaction_id': 't1', 'order_id': 11, 'amount': 1000},
+        {'transaction_id': 't2', 'order_id': 12, 'amount': 2000},
+        {'transaction_id': 't3', 'order_id': 11, 'amount': 3000}
+    ]
+    session = _FakeSession(transactions=transactions, orders=[{'id': 11, 'number': 'WEB-11'}])
+
+    df = asyncio.run(_api(session).get_transactions(fetch_order_numbers=fetch_order_numbers))
+
+    if fetch_order_numbers:
+        assert df['order_number'].to_list() == ['WEB-11', '', 'WEB-11']
+        assert df.schema['order_number'] == pl.String
+        assert [params['include'] for params in session.order_lookups()] == ['11,12']
+    else:
+        assert 'order_number' not in df.columns
+        assert session.order_lookups() == []
+
+
+def test_data_source_transactions_skip_order_lookups():
+    """The transactions data source loads the payments report without /orders requests"""
+    session = _FakeSession(transactions=[{'transaction_id': 't1', 'order_id': 11, 'amount': 1000}])
+
+    df = asyncio.run(_api(session).get_data_source_data('transactions'))
+
+    assert 'order_number' not in df.columns
+    assert session.order_lookups() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -2,41 +2,36 @@
 """
 Test script to verify that order numbers are being fetched correctly
 """
+import asyncio
 import logging
-from src.services.woocommerce_api import WooCommerceAPI
+import polars as pl
+import pytest
+
+from _timing import timed
+
+pytest.importorskip("pytest_asyncio")
+
+# Reuse the session client; the connection is probed once by _require_connection
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.usefixtures("_require_connection")
+]
 
 # Set up logging to see debug output
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-def test_order_numbers():
+async def test_order_numbers(woo_api):
     print("Testing WooCommerce order number fetching...")
     print("-" * 50)
     
-    # Initialize API
-    api = WooCommerceAPI()
-    
-    # Test connection first
-    print("Testing connection...")
-    result = api.test_connection()
-    if not result.get('success'):
-        print(f"Connection failed: {result.get('error')}")
-        return
-    
-    print(f"Connected to: {result.get('store_name')}")
-    print("-" * 50)
-    
-    # Test with order numbers (default)
-    print("Fetching transactions WITH order numbers...")
-    import time
-    start_time = time.time()
-    transactions_df = api.get_transactions(per_page=10, fetch_order_numbers=True)
-    with_orders_time = time.time() - start_time
+    # Both fetches are independent, so overlap them instead of paying two round trips
+    print("Fetching transactions WITH and WITHOUT order numbers...")
+    results = await asyncio.gather(
+        timed(woo_api.get_transactions(per_page=10, fetch_order_numbers=True)),
+        timed(woo_api.get_transactions(per_page=10, fetch_order_numbers=False))
+    )
     
-    # Test without order numbers for comparison
-    print("\nFetching transactions WITHOUT order numbers...")
-    start_time = time.time()
-    transactions_no_orders_df = api.get_transactions(per_page=10, fetch_order_numbers=False)
-    without_orders_time = time.time() - start_time
+    (transactions_df, with_orders_time), (transactions_no_orders_df, without_orders_time) = results
     
     print(f"\nPerformance comparison:")
     print(f"  With order numbers: {with_orders_time:.2f} seconds")
@@ -55,25 +50,30 @@ def test_order_numbers():
     print("\nFirst 5 transactions with order information:")
     print("-" * 80)
     
-    # Select relevant columns for display
-    display_columns = ['transaction_id', 'order_id', 'order_number', 'date', 'amount', 'payment_method']
-    available_columns = [col for col in display_columns if col in transactions_df.columns]
+    # Build each transaction's display block with one Polars expression
+    # instead of materializing a dict per row; absent columns show N/A
+    columns = frozenset(transactions_df.columns)
     
-    subset_df = transactions_df.select(available_columns).head(5)
+    def field(name, expr=None):
+        if name not in columns:
+            return pl.lit('N/A')
+        return (pl.col(name) if expr is None else expr).cast(pl.String).fill_null('N/A')
     
-    for row in subset_df.iter_rows(named=True):
-        print(f"Transaction ID: {row.get('transaction_id', 'N/A')}")
-        print(f"  Order ID: {row.get('order_id', 'N/A')}")
-        print(f"  Order Number: {row.get('order_number', 'N/A')}")
-        print(f"  Date: {row.get('date', 'N/A')}")
-        print(f"  Amount: ${row.get('amount', 0):.2f}")
-        print(f"  Payment Method: {row.get('payment_method', 'N/A')}")
-        print("-" * 40)
+    lines = transactions_df.head(5).select(
+        pl.format(
+            "Transaction ID: {}\n  Order ID: {}\n  Order Number: {}\n  Date: {}\n"
+            "  Amount: ${}\n  Payment Method: {}\n" + "-" * 40,
+            field('transaction_id'), field('order_id'), field('order_number'),
+            field('date'), field('amount', pl.col('amount').round(2).cast(pl.Decimal(None, 2))),
+            field('payment_method')
+        ).alias('line')
+    ).get_column('line').to_list()
+    print("\n".join(lines))
     
     # Check how many transactions have order numbers
-    if 'order_number' in transactions_df.columns:
-        with_order_nums = len(transactions_df.filter(transactions_df['order_number'] != ''))
+    if 'order_number' in columns:
+        with_order_nums = transactions_df.select((pl.col('order_number') != '').sum()).item()
         print(f"\nTransactions with order numbers: {with_order_nums}/{len(transactions_df)}")
 
 if __name__ == "__main__":
-    test_order_numbers()
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
\ No newline at end of file
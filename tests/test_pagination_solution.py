@@ -3,43 +3,62 @@
 Test script to investigate WooPayments API pagination
 Tests different pagination approaches to get ALL transactions for date range
 """
-import sys
-from pathlib import Path
+import asyncio
+import json
+import types
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent / 'src'))
+import polars as pl
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 
-from woocommerce import API
+# Use orjson for page decoding when available (falls back to stdlib json)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # WooCommerce API credentials
 CONSUMER_KEY = "ck_EXAMPLE1234567890abcdefghijklmnop"
 CONSUMER_SECRET = "cs_EXAMPLE0987654321zyxwvutsrqponmlk"
 STORE_URL = "https://shop.company.com"
+API_BASE_URL = f"{STORE_URL}/wp-json/wc/v3"
+
+# Base parameters (working date format); read-only, extend with {**BASE_PARAMS, ...}
+BASE_PARAMS = types.MappingProxyType({
+    'date_after': '2025-05-01 00:00:00',
+    'date_before': '2025-05-31 23:59:59'
+})
+
+# One keep-alive session shared by every test request, so the TLS handshake
+# is paid once instead of per call (woocommerce.API opens a new connection each time)
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8))
+# Advertise every encoding urllib3 can decode, so brotli is negotiated once it is installed
+SESSION.headers.update({'accept': 'application/json', 'Accept-Encoding': ACCEPT_ENCODING})
+SESSION.params = {'consumer_key': CONSUMER_KEY, 'consumer_secret': CONSUMER_SECRET}
+
+def _get(endpoint, params):
+    """GET a wc/v3 endpoint over the shared session"""
+    return SESSION.get(f"{API_BASE_URL}/{endpoint}", params=params, timeout=30)
+
+def _total_fees(rows):
+    """Sum the fees of a page of transaction dicts with one columnar reduction"""
+    df = pl.DataFrame(rows, schema_overrides={'fees': pl.Float64})
+    if 'fees' not in df.columns:
+        return 0.0
+    return df.get_column('fees').fill_null(0.0).sum()
 
 def test_pagination_approaches():
     """Test different pagination approaches for WooPayments API"""
     
-    api = API(
-        url=STORE_URL,
-        consumer_key=CONSUMER_KEY,
-        consumer_secret=CONSUMER_SECRET,
-        version="wc/v3",
-        timeout=30,
-        query_string_auth=True
-    )
-    
     print("="*80)
     print("WooPayments API Pagination Testing")
     print("Date range: 2025-05-01 to 2025-05-31")
     print("="*80)
     
-    # Base parameters (working date format)
-    base_params = {
-        'date_after': '2025-05-01 00:00:00',
-        'date_before': '2025-05-31 23:59:59'
-    }
-    
-    print(f"\nBase parameters: {base_params}")
+    print(f"\nBase parameters: {dict(BASE_PARAMS)}")
     
     # Test 1: Current approach (no pagination - should get 25 results)
     print(f"\n{'-'*60}")
@@ -47,9 +66,9 @@ def test_pagination_approaches():
     print(f"{'-'*60}")
     
     try:
-        response = api.get("payments/reports/transactions", params=base_params)
+        response = _get("payments/reports/transactions", params=BASE_PARAMS)
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             print(f"✅ SUCCESS: {len(data)} transactions")
             if data:
                 first_date = data[0].get('date', 'N/A')
@@ -57,7 +76,7 @@ def test_pagination_approaches():
                 print(f"   Date range: {last_date} to {first_date}")
                 
                 # Check for fees
-                total_fees = sum(t.get('fees', 0) for t in data)
+                total_fees = _total_fees(data)
                 print(f"   Total fees: ${total_fees:.2f}")
         else:
             print(f"❌ FAILED: Status {response.status_code}")
@@ -69,13 +88,12 @@ def test_pagination_approaches():
     print("TEST 2: With per_page=100")
     print(f"{'-'*60}")
     
-    params_with_per_page = base_params.copy()
-    params_with_per_page['per_page'] = 100
+    params_with_per_page = {**BASE_PARAMS, 'per_page': 100}
     
     try:
-        response = api.get("payments/reports/transactions", params=params_with_per_page)
+        response = _get("payments/reports/transactions", params=params_with_per_page)
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             print(f"✅ SUCCESS: {len(data)} transactions")
             if data:
                 first_date = data[0].get('date', 'N/A')
@@ -83,7 +101,7 @@ def test_pagination_approaches():
                 print(f"   Date range: {last_date} to {first_date}")
                 
                 # Check for fees
-                total_fees = sum(t.get('fees', 0) for t in data)
+                total_fees = _total_fees(data)
                 print(f"   Total fees: ${total_fees:.2f}")
         else:
             print(f"❌ FAILED: Status {response.status_code}")
@@ -100,14 +118,12 @@ def test_pagination_approaches():
     print("TEST 3: With pagination (page=1, per_page=100)")
     print(f"{'-'*60}")
     
-    params_with_pagination = base_params.copy()
-    params_with_pagination['page'] = 1
-    params_with_pagination['per_page'] = 100
+    params_with_pagination = {**BASE_PARAMS, 'page': 1, 'per_page': 100}
     
     try:
-        response = api.get("payments/reports/transactions", params=params_with_pagination)
+        response = _get("payments/reports/transactions", params=params_with_pagination)
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             print(f"✅ SUCCESS: {len(data)} transactions")
             if data:
                 first_date = data[0].get('date', 'N/A')
@@ -115,7 +131,7 @@ def test_pagination_approaches():
                 print(f"   Date range: {last_date} to {first_date}")
                 
                 # Check for fees
-                total_fees = sum(t.get('fees', 0) for t in data)
+                total_fees = _total_fees(data)
                 print(f"   Total fees: ${total_fees:.2f}")
         else:
             print(f"❌ FAILED: Status {response.status_code}")
@@ -132,61 +148,77 @@ def test_pagination_approaches():
     print("TEST 4: Multi-page pagination (simulating loop)")
     print(f"{'-'*60}")
     
-    all_transactions = []
-    page = 1
+    frames = []
     max_pages = 5  # Safety limit for testing
+    per_page = 25  # Use smaller page size to test pagination
     
-    while page <= max_pages:
-        params_page = base_params.copy()
-        params_page['page'] = page
-        params_page['per_page'] = 25  # Use smaller page size to test pagination
+    async def _fetch_pages():
+        # Fetch every page concurrently over the shared session, at most 3 in flight
+        semaphore = asyncio.Semaphore(3)
         
-        print(f"  Fetching page {page}...")
-        
-        try:
-            response = api.get("payments/reports/transactions", params=params_page)
-            if response.status_code == 200:
-                data = response.json()
-                print(f"    Page {page}: {len(data)} transactions")
-                
-                if not data or len(data) == 0:
-                    print(f"    No more data on page {page}, stopping")
-                    break
-                
-                all_transactions.extend(data)
-                
-                # If we got fewer than requested, we've reached the end
-                if len(data) < 25:
-                    print(f"    Reached last page (got {len(data)} < 25)")
-                    break
-                    
-                page += 1
-            else:
-                print(f"    ❌ Page {page} failed: Status {response.status_code}")
+        async def _fetch(page):
+            params_page = {**BASE_PARAMS, 'page': page, 'per_page': per_page}
+            async with semaphore:
+                print(f"  Fetching page {page}...")
                 try:
-                    error = response.json()
-                    print(f"    Error: {error}")
-                except:
-                    print(f"    Raw error: {response.text[:200]}")
-                break
-        except Exception as e:
-            print(f"    ❌ Page {page} error: {e}")
-            break
+                    return page, await asyncio.to_thread(_get, "payments/reports/transactions", params_page)
+                except Exception as e:
+                    return page, e
+        
+        return await asyncio.gather(*(_fetch(page) for page in range(1, max_pages + 1)))
     
-    if all_transactions:
-        print(f"\n✅ TOTAL COLLECTED: {len(all_transactions)} transactions from {page-1} pages")
-        if all_transactions:
-            first_date = all_transactions[0].get('date', 'N/A')
-            last_date = all_transactions[-1].get('date', 'N/A')
-            print(f"   Complete date range: {last_date} to {first_date}")
+    # Walk the results in page order; pages past the first short page are discarded
+    for page, response in asyncio.run(_fetch_pages()):
+        if isinstance(response, Exception):
+            print(f"    ❌ Page {page} error: {response}")
+            break
+        if response.status_code == 200:
+            data = _json_loads(response.content)
+            print(f"    Page {page}: {len(data)} transactions")
+            
+            if not data or len(data) == 0:
+                print(f"    No more data on page {page}, stopping")
+                break
             
-            # Check for fees
-            total_fees = sum(t.get('fees', 0) for t in all_transactions)
-            print(f"   Total fees: ${total_fees:.2f}")
+            frames.append(pl.DataFrame(data))
             
-            # Show unique order IDs
-            order_ids = set(t.get('order_id') for t in all_transactions if t.get('order_id'))
-            print(f"   Unique orders: {len(order_ids)}")
+            # If we got fewer than requested, we've reached the end
+            if len(data) < per_page:
+                print(f"    Reached last page (got {len(data)} < {per_page})")
+                break
+        else:
+            print(f"    ❌ Page {page} failed: Status {response.status_code}")
+            try:
+                error = response.json()
+                print(f"    Error: {error}")
+            except:
+                print(f"    Raw error: {response.text[:200]}")
+            break
+    
+    if frames:
+        # Combine the pages once and aggregate columnarly
+        all_transactions = pl.concat(frames, how='diagonal_relaxed')
+        print(f"\n✅ TOTAL COLLECTED: {all_transactions.height} transactions from {len(frames)} pages")
+        if 'date' in all_transactions.columns:
+            first_date = all_transactions['date'][0]
+            last_date = all_transactions['date'][-1]
+        else:
+            first_date = last_date = 'N/A'
+        print(f"   Complete date range: {last_date} to {first_date}")
+        
+        # Check for fees
+        total_fees = (
+            all_transactions.select(pl.col('fees').sum()).item()
+            if 'fees' in all_transactions.columns else 0
+        )
+        print(f"   Total fees: ${total_fees:.2f}")
+        
+        # Show unique order IDs
+        unique_orders = (
+            all_transactions.select(pl.col('order_id').drop_nulls().n_unique()).item()
+            if 'order_id' in all_transactions.columns else 0
+        )
+        print(f"   Unique orders: {unique_orders}")
     else:
         print("❌ No transactions collected from pagination")
     
@@ -196,9 +228,9 @@ def test_pagination_approaches():
     print(f"{'-'*60}")
     
     try:
-        response = api.get("payments/transactions", params=base_params)
+        response = _get("payments/transactions", params=BASE_PARAMS)
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             # This endpoint returns data in 'data' key
             if isinstance(data, dict) and 'data' in data:
                 transactions = data['data']
@@ -209,7 +241,7 @@ def test_pagination_approaches():
                     print(f"   Date range: {last_date} to {first_date}")
                     
                     # Check for fees
-                    total_fees = sum(t.get('fees', 0) for t in transactions)
+                    total_fees = _total_fees(transactions)
                     print(f"   Total fees: ${total_fees:.2f}")
             else:
                 print(f"✅ SUCCESS: Response structure: {type(data)}")
@@ -3,42 +3,105 @@
 Test script using existing WooCommerce API class to test pagination
 Run this in your main environment where dependencies are available
 """
-import sys
+import asyncio
 import logging
-from pathlib import Path
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent / 'src'))
+import polars as pl
+import pytest
 
-try:
-    from src.services.woocommerce_api import WooCommerceAPI
-    print("✅ WooCommerce API class imported successfully")
-except ImportError as e:
-    print(f"❌ Failed to import WooCommerce API: {e}")
-    sys.exit(1)
+pytest.importorskip("pytest_asyncio")
+
+# Share the session-scoped event loop so the woo_api fixture's pool is reused
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
 # Setup logging to see debug output
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def test_pagination_solutions():
+def cached_page_fetcher(woo_api):
+    """Wrap get_transactions so a page requested by several approaches is fetched once
+    
+    Calls are memoized on their (per_page, page) arguments for the lifetime of one run;
+    the date range and order-number flag are fixed for every approach. The first caller
+    of a page starts its request as a task and concurrent callers await that same task
+    instead of requesting the page again.
+    """
+    pages = {}
+    
+    async def get_page(per_page, page):
+        task = pages.get((per_page, page))
+        if task is None:
+            task = pages[(per_page, page)] = asyncio.ensure_future(woo_api.get_transactions(
+                per_page=per_page,
+                page=page,
+                date_after='2025-05-01',
+                date_before='2025-05-31',
+                fetch_order_numbers=False  # Skip for speed
+            ))
+        return await task
+    
+    return get_page
+
+async def iter_transaction_pages(get_page, per_page, max_pages=10):
+    """Yield one transactions DataFrame per page until a short or empty page"""
+    for page in range(1, max_pages + 1):  # max_pages is a safety limit
+        print(f"  Fetching page {page} (per_page={per_page})...")
+        
+        page_df = await get_page(per_page, page)
+        
+        if page_df is None or len(page_df) == 0:
+            print(f"    No data on page {page}, stopping")
+            return
+        
+        print(f"    Page {page}: {len(page_df)} transactions")
+        yield page_df
+        
+        # If we got fewer than requested, we've reached the end
+        if len(page_df) < per_page:
+            print(f"    Reached last page (got {len(page_df)} < {per_page})")
+            return
+
+async def run_approach(approach, woo_api, get_page):
+    """Fetch one approach's transactions through the shared client and page fetcher"""
+    if approach['method'] == 'single_call':
+        # Test single call with parameters
+        return await get_page(approach['params']['per_page'], approach['params']['page'])
+    
+    if approach['method'] == 'get_all':
+        # Test current get_all_transactions method
+        return await woo_api.get_all_transactions(
+            date_after='2025-05-01',
+            date_before='2025-05-31',
+            fetch_order_numbers=False  # Skip for speed
+        )
+    
+    if approach['method'] == 'manual_pagination':
+        # Manual pagination simulation
+        pages = [page_df async for page_df in iter_transaction_pages(get_page, per_page=approach['params']['per_page'])]
+        
+        # Combine all pages
+        if pages:
+            result_df = pl.concat(pages, how="vertical", rechunk=False)
+            print(f"  Combined pages into {len(result_df)} transactions")
+            return result_df
+    
+    return None
+
+async def test_pagination_solutions(woo_api):
     """Test different approaches to get ALL transactions from WooPayments API"""
     
     print("="*80)
     print("WooPayments API Pagination Testing")
-    print("Using existing WooCommerceAPI class")
+    print("Using existing AsyncWooCommerceAPI class")
     print("Date range: 2025-05-01 to 2025-05-31")
     print("="*80)
     
-    # Initialize API
-    woo_api = WooCommerceAPI()
-    
     # Test connection first
     print("\n1. Testing connection...")
-    connection_result = woo_api.test_connection()
+    connection_result = await woo_api.test_connection()
     if not connection_result.get('success'):
-        print(f"❌ Connection failed: {connection_result}")
-        return
+        # Every approach goes through the same credentials, so one failed probe ends the run
+        pytest.skip(f"WooCommerce unreachable: {connection_result}")
     print(f"✅ Connected: {connection_result.get('details')}")
     
     # Test different approaches
@@ -67,69 +130,25 @@ def test_pagination_solutions():
     
     results = {}
     
-    for approach in approaches:
+    # The approaches are independent and I/O-bound, so they run concurrently on
+    # the one client through a shared page fetcher (a page requested by several
+    # approaches is fetched once); results are analyzed in the original order
+    get_page = cached_page_fetcher(woo_api)
+    print(f"\nRunning {len(approaches)} approaches concurrently...")
+    outcomes = await asyncio.gather(
+        *(run_approach(approach, woo_api, get_page) for approach in approaches),
+        return_exceptions=True
+    )
+    
+    for approach, outcome in zip(approaches, outcomes):
         print(f"\n{'-'*60}")
         print(f"Testing: {approach['name']}")
         print(f"{'-'*60}")
         
         try:
-            if approach['method'] == 'single_call':
-                # Test single call with parameters
-                result_df = woo_api.get_transactions(
-                    per_page=approach['params']['per_page'],
-                    page=approach['params']['page'],
-                    date_after='2025-05-01',
-                    date_before='2025-05-31',
-                    fetch_order_numbers=False  # Skip for speed
-                )
-                
-            elif approach['method'] == 'get_all':
-                # Test current get_all_transactions method
-                result_df = woo_api.get_all_transactions(
-                    date_after='2025-05-01',
-                    date_before='2025-05-31',
-                    fetch_order_numbers=False  # Skip for speed
-                )
-                
-            elif approach['method'] == 'manual_pagination':
-                # Manual pagination simulation
-                all_transactions = []
-                page = 1
-                max_pages = 10  # Safety limit
-                per_page = approach['params']['per_page']
-                
-                while page <= max_pages:
-                    print(f"  Fetching page {page} (per_page={per_page})...")
-                    
-                    page_df = woo_api.get_transactions(
-                        per_page=per_page,
-                        page=page,
-                        date_after='2025-05-01',
-                        date_before='2025-05-31',
-                        fetch_order_numbers=False
-                    )
-                    
-                    if page_df is None or len(page_df) == 0:
-                        print(f"    No data on page {page}, stopping")
-                        break
-                    
-                    print(f"    Page {page}: {len(page_df)} transactions")
-                    all_transactions.append(page_df)
-                    
-                    # If we got fewer than requested, we've reached the end
-                    if len(page_df) < per_page:
-                        print(f"    Reached last page (got {len(page_df)} < {per_page})")
-                        break
-                    
-                    page += 1
-                
-                # Combine all pages
-                if all_transactions:
-                    import polars as pl
-                    result_df = pl.concat(all_transactions, how="vertical")
-                    print(f"  Combined {len(all_transactions)} pages")
-                else:
-                    result_df = None
+            if isinstance(outcome, Exception):
+                raise outcome
+            result_df = outcome
             
             # Analyze results
             if result_df is not None and len(result_df) > 0:
@@ -215,4 +234,4 @@ def test_pagination_solutions():
     print(f"{'='*80}")
 
 if __name__ == "__main__":
-    test_pagination_solutions()
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
\ No newline at end of file
@@ -3,21 +3,26 @@
 Test script to analyze payment_id matching vs order number matching
 This will help us understand data quality and matching accuracy
 """
+import asyncio
 import sys
 import logging
 from pathlib import Path
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent / 'src'))
+import polars as pl
 
-from src.services.woocommerce_api import WooCommerceAPI
-from src.services.salesforce_api import SalesforceAPI
+# Add the project root to Python path so src.* resolves when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.async_woocommerce_api import AsyncWooCommerceAPI
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def analyze_payment_id_data():
+# Orders whose numbers are looked up to spot-check the payment_id/order mapping
+ORDER_NUMBER_SAMPLE_SIZE = 50
+
+async def analyze_payment_id_data():
     """Analyze payment_id vs order number matching accuracy"""
     
     print("="*80)
@@ -25,9 +30,12 @@ def analyze_payment_id_data():
     print("Comparing payment_id matching vs order number matching")
     print("="*80)
     
-    # Initialize APIs
-    woo_api = WooCommerceAPI()
-    sf_api = SalesforceAPI()
+    # One client (and connection pool) serves the transaction fetch and the sample lookup
+    async with AsyncWooCommerceAPI() as woo_api:
+        await _analyze(woo_api)
+
+async def _analyze(woo_api):
+    """Run the analysis steps against an open client"""
     
     # Test date range
     date_after = "2025-05-01"
@@ -36,12 +44,12 @@ def analyze_payment_id_data():
     print(f"\nAnalyzing data for: {date_after} to {date_before}")
     print("-"*80)
     
-    # Step 1: Fetch WooCommerce transactions (with order numbers for comparison)
+    # Step 1: Fetch WooCommerce transactions (order_id is the order key; numbers are sampled in step 3)
     print("\n1. Fetching WooCommerce transactions...")
-    woo_df = woo_api.get_all_transactions(
+    woo_df = await woo_api.get_all_transactions(
         date_after=date_after,
         date_before=date_before,
-        fetch_order_numbers=True  # Keep this for comparison
+        fetch_order_numbers=False
     )
     
     if woo_df is None or len(woo_df) == 0:
@@ -53,27 +61,46 @@ def analyze_payment_id_data():
     
     # Step 2: Analyze payment_id field
     print("\n2. Analyzing payment_id field...")
-    payment_ids = woo_df['payment_id'].to_list()
-    order_ids = woo_df['order_id'].to_list()
-    order_numbers = woo_df['order_number'].to_list() if 'order_number' in woo_df.columns else []
-    
-    # Count non-empty payment_ids
-    non_empty_payment_ids = [pid for pid in payment_ids if pid and str(pid).strip()]
-    pi_payment_ids = [pid for pid in non_empty_payment_ids if str(pid).startswith('pi_')]
+    # Count non-empty payment_ids with a column mask; nulls never pass the filter
+    non_empty_payment_ids = woo_df['payment_id'].filter(
+        woo_df['payment_id'].cast(pl.String).str.strip_chars() != ''
+    )
+    pi_payment_ids = woo_df['payment_id'].filter(woo_df['payment_id'].cast(pl.String).str.starts_with('pi_'))
     
-    print(f"   Total transactions: {len(payment_ids)}")
+    print(f"   Total transactions: {woo_df.height}")
     print(f"   Non-empty payment_ids: {len(non_empty_payment_ids)}")
     print(f"   Payment_ids starting with 'pi_': {len(pi_payment_ids)}")
-    print(f"   Sample payment_ids: {pi_payment_ids[:5]}")
-    
-    # Step 3: Analyze order number field
-    print("\n3. Analyzing order number field...")
-    if order_numbers:
-        non_empty_order_numbers = [on for on in order_numbers if on and str(on).strip() and str(on) != '0']
-        print(f"   Non-empty order_numbers: {len(non_empty_order_numbers)}")
-        print(f"   Sample order_numbers: {non_empty_order_numbers[:5]}")
+    print(f"   Sample payment_ids: {pi_payment_ids.head(5).to_list()}")
+    
+    # Step 3: Analyze order_id field, spot-checking order numbers on a sample
+    print("\n3. Analyzing order_id field...")
+    print("   Note: order_id stands in for order_number from here on; order numbers are")
+    print(f"   only resolved for a sample of up to {ORDER_NUMBER_SAMPLE_SIZE} orders")
+    order_id_clean = pl.col('order_id').cast(pl.String).str.strip_chars()
+    has_order_id = order_id_clean.is_not_null() & ~order_id_clean.is_in(['', '0'])
+    valid_order_ids = woo_df.filter(has_order_id).get_column('order_id').cast(pl.String).str.strip_chars()
+    valid_order_count = len(valid_order_ids)
+    print(f"   Non-empty order_ids: {valid_order_count}")
+    
+    sampled_order_ids = valid_order_ids.unique().sample(min(ORDER_NUMBER_SAMPLE_SIZE, valid_order_ids.n_unique()))
+    if not sampled_order_ids.is_empty():
+        try:
+            numbers_by_id = await woo_api.get_order_numbers(sampled_order_ids.to_list())
+        except Exception as e:
+            print(f"   Could not fetch sample order numbers: {e}")
+            numbers_by_id = {}
+        
+        sampled_numbers = pl.Series('order_number', list(numbers_by_id.values()), dtype=pl.String)
+        print(f"   Order numbers resolved for sample: {len(numbers_by_id)}/{len(sampled_order_ids)}")
+        print(f"   Sample order_numbers: {sampled_numbers.head(5).to_list()}")
+        if not numbers_by_id:
+            print("   ⚠️  No order numbers resolved for the sample")
+        elif sampled_numbers.n_unique() == len(numbers_by_id):
+            print("   ✅ Sampled order_ids map 1:1 to order numbers")
+        else:
+            print("   ⚠️  Sampled order_ids share order numbers")
     else:
-        print("   No order_number field available")
+        print("   No order_id values available")
     
     # Step 4: Try to fetch Salesforce data for comparison
     print("\n4. Analyzing Salesforce data compatibility...")
@@ -89,64 +116,54 @@ def analyze_payment_id_data():
     # Step 5: Payment ID vs Order ID correlation analysis
     print("\n5. Payment ID vs Order correlation analysis...")
     
-    # Create mapping analysis
-    payment_to_order = {}
-    order_to_payment = {}
-    
-    for i, (pid, oid, onum) in enumerate(zip(payment_ids, order_ids, order_numbers if order_numbers else [None]*len(order_ids))):
-        if pid and str(pid).strip():
-            pid_clean = str(pid).strip()
-            oid_clean = str(oid).strip() if oid else None
-            onum_clean = str(onum).strip() if onum and str(onum) != '0' else None
-            
-            if pid_clean.startswith('pi_'):
-                payment_to_order[pid_clean] = {
-                    'order_id': oid_clean,
-                    'order_number': onum_clean,
-                    'index': i
-                }
-                
-                if oid_clean:
-                    if oid_clean not in order_to_payment:
-                        order_to_payment[oid_clean] = []
-                    order_to_payment[oid_clean].append(pid_clean)
-    
-    print(f"   Unique payment_ids (pi_*): {len(payment_to_order)}")
-    print(f"   Unique order_ids with payments: {len(order_to_payment)}")
+    # Create mapping analysis with column expressions over the whole frame
+    payment_id_clean = pl.col('payment_id').cast(pl.String).str.strip_chars()
+    
+    pi_rows = woo_df.filter(payment_id_clean.str.starts_with('pi_')).select(
+        payment_id_clean.alias('payment_id'),
+        order_id_clean.alias('order_id')
+    )
+    order_to_payment = (
+        pi_rows.filter(pl.col('order_id').is_not_null() & ~pl.col('order_id').is_in(['', '0']))
+        .group_by('order_id', maintain_order=True)
+        .agg(pl.col('payment_id').alias('payment_ids'))
+    )
+    
+    print(f"   Unique payment_ids (pi_*): {pi_rows['payment_id'].n_unique()}")
+    print(f"   Unique order_ids with payments: {order_to_payment.height}")
     
     # Check for 1:1 mapping
-    multiple_payments_per_order = {oid: pids for oid, pids in order_to_payment.items() if len(pids) > 1}
-    if multiple_payments_per_order:
-        print(f"   ⚠️  Orders with multiple payment_ids: {len(multiple_payments_per_order)}")
-        print(f"   Sample: {dict(list(multiple_payments_per_order.items())[:3])}")
+    multiple_payments_per_order = order_to_payment.filter(pl.col('payment_ids').list.len() > 1)
+    if not multiple_payments_per_order.is_empty():
+        print(f"   ⚠️  Orders with multiple payment_ids: {multiple_payments_per_order.height}")
+        print(f"   Sample: {dict(multiple_payments_per_order.head(3).iter_rows())}")
     else:
         print("   ✅ All orders have unique payment_ids (1:1 mapping)")
     
     # Step 6: Fee analysis by matching method
     print("\n6. Fee analysis...")
     if 'fees' in woo_df.columns:
-        fees_column = woo_df['fees'].to_list()
+        fee = pl.col('fees').cast(pl.Float64).fill_null(0.0)
         
-        # Fees by payment_id
-        fees_with_payment_id = []
-        fees_with_order_number = []
+        # Fees by payment_id and by order_id, totalled and counted in one pass
+        by_payment_id = pl.col('payment_id').cast(pl.String).str.starts_with('pi_') & (fee > 0)
+        by_order_id = has_order_id & (fee > 0)
         
-        for i, (pid, onum, fee) in enumerate(zip(payment_ids, order_numbers if order_numbers else [None]*len(payment_ids), fees_column)):
-            fee_val = float(fee) if fee else 0.0
-            
-            if pid and str(pid).startswith('pi_') and fee_val > 0:
-                fees_with_payment_id.append(fee_val)
-            
-            if onum and str(onum) != '0' and fee_val > 0:
-                fees_with_order_number.append(fee_val)
+        fee_summary = woo_df.select(
+            pl.when(by_payment_id).then(fee).otherwise(0.0).sum().alias('fees_pi'),
+            pl.when(by_order_id).then(fee).otherwise(0.0).sum().alias('fees_order'),
+            by_payment_id.sum().alias('cnt_pi'),
+            by_order_id.sum().alias('cnt_order'),
+        ).row(0, named=True)
         
-        print(f"   Transactions with fees > 0 (by payment_id): {len(fees_with_payment_id)}")
-        print(f"   Transactions with fees > 0 (by order_number): {len(fees_with_order_number)}")
-        print(f"   Total fees (payment_id method): ${sum(fees_with_payment_id):.2f}")
-        print(f"   Total fees (order_number method): ${sum(fees_with_order_number):.2f}")
+        print("   (order-side figures use order_id, not order_number)")
+        print(f"   Transactions with fees > 0 (by payment_id): {fee_summary['cnt_pi']}")
+        print(f"   Transactions with fees > 0 (by order_id): {fee_summary['cnt_order']}")
+        print(f"   Total fees (payment_id method): ${fee_summary['fees_pi']:.2f}")
+        print(f"   Total fees (order_id method): ${fee_summary['fees_order']:.2f}")
         
         # Check if they match
-        if abs(sum(fees_with_payment_id) - sum(fees_with_order_number)) < 0.01:
+        if abs(fee_summary['fees_pi'] - fee_summary['fees_order']) < 0.01:
             print("   ✅ Fee totals match between methods")
         else:
             print("   ⚠️  Fee totals differ between methods")
@@ -161,7 +178,7 @@ def analyze_payment_id_data():
         print(f"   - {len(pi_payment_ids)} transactions have valid payment_ids")
         print(f"   - Payment_ids provide direct unique identification")
         
-        if not multiple_payments_per_order:
+        if multiple_payments_per_order.is_empty():
             print("   - Clean 1:1 mapping between payment_id and orders")
         
         print("\n🚀 RECOMMENDED OPTIMIZATION:")
@@ -170,11 +187,11 @@ def analyze_payment_id_data():
         print("   3. Match Salesforce 'Payment ID' directly to WooCommerce 'payment_id'")
         print("   4. Expected performance gain: 60-70% faster processing")
         
-        # Calculate potential API call savings
-        if order_numbers:
-            unique_orders = len(set(order_numbers))
-            batch_calls = (unique_orders // 100) + 1
-            print(f"   5. API calls saved: ~{batch_calls} order lookup calls eliminated")
+        # Calculate potential API call savings: one order number lookup per 100 unique order_ids
+        unique_orders = valid_order_ids.n_unique()
+        batch_calls = -(-unique_orders // 100)
+        print(f"   5. API calls saved: ~{batch_calls} order lookup calls eliminated "
+              f"({unique_orders} unique order_ids)")
     else:
         print("❌ PAYMENT_ID MATCHING NOT VIABLE:")
         print("   - No valid payment_ids found in data")
@@ -183,8 +200,8 @@ def analyze_payment_id_data():
     print(f"\n📊 DATA SUMMARY:")
     print(f"   Total transactions: {len(woo_df)}")
     print(f"   Valid payment_ids: {len(pi_payment_ids)}")
-    print(f"   Valid order_numbers: {len(non_empty_order_numbers) if order_numbers else 0}")
+    print(f"   Valid order_ids: {valid_order_count}")
     print(f"   Matching coverage: {(len(pi_payment_ids) / len(woo_df) * 100):.1f}%")
 
 if __name__ == "__main__":
-    analyze_payment_id_data()
\ No newline at end of file
+    asyncio.run(analyze_payment_id_data())
\ No newline at end of file
@@ -3,20 +3,35 @@
 Test script to validate payment_id matching logic
 This simulates the new matching approach and compares results
 """
-import sys
+import asyncio
 import logging
-from pathlib import Path
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent / 'src'))
+import polars as pl
+import pytest
 
-from src.services.woocommerce_api import WooCommerceAPI
+pytest.importorskip("pytest_asyncio")
+
+# Reuse the session client; the connection is probed once by _require_connection
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.usefixtures("_require_connection")
+]
 
 # Setup logging to reduce noise during testing
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
-def test_payment_id_matching():
+# Columns of the simulated Salesforce records; order numbers are compared as strings
+SF_SCHEMA = {
+    'Payment ID': pl.String,
+    'Webstore Order #': pl.String,
+    'SKU': pl.String,
+    'Quantity': pl.Int64,
+    'Unit Price': pl.Float64,
+    'Account Name': pl.String
+}
+
+async def test_payment_id_matching(woo_api):
     """Test the new payment_id matching logic"""
     
     print("="*80)
@@ -24,9 +39,6 @@ def test_payment_id_matching():
     print("Testing new payment_id-based matching vs current order_number approach")
     print("="*80)
     
-    # Initialize API
-    woo_api = WooCommerceAPI()
-    
     # Test date range
     date_after = "2025-05-01"
     date_before = "2025-05-31"
@@ -34,12 +46,20 @@ def test_payment_id_matching():
     print(f"\nTest date range: {date_after} to {date_before}")
     print("-"*80)
     
-    # Fetch WooCommerce data with order numbers for comparison
+    # Fetch WooCommerce data with and without order numbers for comparison; the two
+    # sweeps are independent and network-bound, so they share the one client concurrently
     print("\n1. Fetching WooCommerce transaction data...")
-    woo_df = woo_api.get_all_transactions(
-        date_after=date_after,
-        date_before=date_before,
-        fetch_order_numbers=False  # Use payment_id approach
+    woo_df, order_number_woo_df = await asyncio.gather(
+        woo_api.get_all_transactions(
+            date_after=date_after,
+            date_before=date_before,
+            fetch_order_numbers=False  # Use payment_id approach
+        ),
+        woo_api.get_all_transactions(
+            date_after=date_after,
+            date_before=date_before,
+            fetch_order_numbers=True
+        )
     )
     
     if woo_df is None or len(woo_df) == 0:
@@ -48,32 +68,45 @@ def test_payment_id_matching():
     
     print(f"✅ Fetched {len(woo_df)} WooCommerce transactions")
     
-    # Convert to list of dicts for easier processing
-    woo_records = woo_df.to_dicts()
+    # Both fetches must describe the same transactions for the comparison to hold
+    assert order_number_woo_df is not None, "fetch_order_numbers=True fetch failed"
+    fees_total = pl.col('fees').cast(pl.Float64, strict=False).fill_null(0.0).sum()
+    payment_id_fees_total = woo_df.select(fees_total).item()
+    order_number_fees_total = order_number_woo_df.select(fees_total).item()
+    print(f"   fetch_order_numbers=True: {order_number_woo_df.height} transactions, "
+          f"${order_number_fees_total:.2f} in fees")
+    assert order_number_woo_df.height == woo_df.height
+    assert abs(order_number_fees_total - payment_id_fees_total) < 0.01
+    
+    # Normalize fees to Float64 once so every analysis below reads the column as-is
+    woo_df = woo_df.with_columns(pl.col('fees').cast(pl.Float64, strict=False).fill_null(0.0))
+    
+    fee_amount = pl.col('fees')
+    order_id_key = pl.col('order_id').cast(pl.String).fill_null('')
+    payment_id_key = pl.col('payment_id').cast(pl.String).str.strip_chars()
+    has_order_id = (order_id_key != '') & (order_id_key != '0')
+    has_payment_id = payment_id_key.str.starts_with('pi_')
+    
+    # Fee totals and counts for both methods in one columnar pass
+    order_number_fees, order_number_count, payment_id_fees, payment_id_count = woo_df.select(
+        fee_amount.filter(has_order_id & (fee_amount > 0)).sum().alias('order_number_fees'),
+        (has_order_id & (fee_amount > 0)).sum().alias('order_number_count'),
+        fee_amount.filter(has_payment_id & (fee_amount > 0)).sum().alias('payment_id_fees'),
+        (has_payment_id & (fee_amount > 0)).sum().alias('payment_id_count')
+    ).row(0)
     
     # Method 1: Current order_number matching (simulated)
     print("\n2. Testing current order_number matching approach...")
     
     # Simulate current approach: create lookup by order_number
-    order_number_lookup = {}
-    order_number_fees = 0.0
-    order_number_count = 0
-    
     # Note: Since we're not fetching order_numbers, we'll simulate using order_id
     # In real scenario, this would require additional API calls
-    for record in woo_records:
-        order_id = str(record.get('order_id', ''))
-        if order_id and order_id != '0':
-            # Simulate order_number (in reality this comes from additional API call)
-            simulated_order_number = order_id  # order_id would map to order_number
-            order_number_lookup[simulated_order_number] = record
-            
-            fees = float(record.get('fees', 0))
-            if fees > 0:
-                order_number_fees += fees
-                order_number_count += 1
-    
-    print(f"   Order number lookup created: {len(order_number_lookup)} mappings")
+    order_number_df = woo_df.filter(has_order_id)
+    
+    # order_id would map to order_number; one mapping per distinct order_id
+    order_number_mappings = order_number_df.select(order_id_key.n_unique()).item()
+    
+    print(f"   Order number lookup created: {order_number_mappings} mappings")
     print(f"   Orders with fees (order_number): {order_number_count}")
     print(f"   Total fees (order_number): ${order_number_fees:.2f}")
     
@@ -81,48 +114,27 @@ def test_payment_id_matching():
     print("\n3. Testing new payment_id matching approach...")
     
     # Create lookup by payment_id
-    payment_id_lookup = {}
-    payment_id_fees = 0.0
-    payment_id_count = 0
-    
-    for record in woo_records:
-        payment_id = str(record.get('payment_id', '')).strip()
-        if payment_id and payment_id.startswith('pi_'):
-            payment_id_lookup[payment_id] = record
-            
-            fees = float(record.get('fees', 0))
-            if fees > 0:
-                payment_id_fees += fees
-                payment_id_count += 1
-    
-    print(f"   Payment ID lookup created: {len(payment_id_lookup)} mappings")
+    payment_id_df = woo_df.filter(has_payment_id)
+    
+    payment_id_mappings = payment_id_df.select(payment_id_key.n_unique()).item()
+    
+    print(f"   Payment ID lookup created: {payment_id_mappings} mappings")
     print(f"   Orders with fees (payment_id): {payment_id_count}")
     print(f"   Total fees (payment_id): ${payment_id_fees:.2f}")
     
     # Method 3: Cross-validation between approaches
     print("\n4. Cross-validation analysis...")
     
-    # Compare the two approaches
-    order_ids_with_fees = set()
-    payment_ids_with_fees = set()
-    
-    # Track which records have fees in each approach
-    for record in woo_records:
-        fees = float(record.get('fees', 0))
-        if fees > 0:
-            # Order number approach
-            order_id = str(record.get('order_id', ''))
-            if order_id and order_id != '0':
-                order_ids_with_fees.add(order_id)
-            
-            # Payment ID approach
-            payment_id = str(record.get('payment_id', '')).strip()
-            if payment_id and payment_id.startswith('pi_'):
-                payment_ids_with_fees.add(payment_id)
+    # Compare the two approaches: which keys carry fees, from one precomputed fee mask
+    fees_mask_df = woo_df.with_columns((fee_amount > 0).alias('has_fee'))
+    order_ids_with_fees, payment_ids_with_fees = fees_mask_df.select(
+        order_id_key.filter(pl.col('has_fee') & has_order_id).n_unique().alias('order_ids'),
+        payment_id_key.filter(pl.col('has_fee') & has_payment_id).n_unique().alias('payment_ids')
+    ).row(0)
     
     # Analysis
-    print(f"   Records with fees (order_id method): {len(order_ids_with_fees)}")
-    print(f"   Records with fees (payment_id method): {len(payment_ids_with_fees)}")
+    print(f"   Records with fees (order_id method): {order_ids_with_fees}")
+    print(f"   Records with fees (payment_id method): {payment_ids_with_fees}")
     
     # Check for discrepancies
     fees_match = abs(order_number_fees - payment_id_fees) < 0.01
@@ -143,16 +155,16 @@ def test_payment_id_matching():
     simulated_sf_records = []
     
     # Create mock Salesforce data based on WooCommerce payment_ids
-    sample_payment_ids = [pid for pid in payment_id_lookup.keys()][:10]  # Take first 10
+    # Take first 10; the last row per payment_id wins, as in the lookup
+    sample_df = payment_id_df.select(payment_id_key.alias('payment_id'), 'order_id').unique(
+        'payment_id', keep='last', maintain_order=True
+    ).head(10)
     
-    for i, payment_id in enumerate(sample_payment_ids):
-        woo_record = payment_id_lookup[payment_id]
-        order_id = woo_record.get('order_id', '')
-        
+    for i, row in enumerate(sample_df.iter_rows(named=True)):
         # Simulate Salesforce record
         sf_record = {
-            'Payment ID': payment_id,
-            'Webstore Order #': order_id,
+            'Payment ID': row['payment_id'],
+            'Webstore Order #': row['order_id'],
             'SKU': f'PRODUCT-{i+1}',
             'Quantity': 1,
             'Unit Price': 25.00,
@@ -165,35 +177,54 @@ def test_payment_id_matching():
     # Test matching by Payment ID
     print("\n6. Testing Payment ID matching with simulated Salesforce data...")
     
-    matched_by_payment_id = 0
-    total_matched_fees = 0.0
+    # Hash-join the Salesforce records against each WooCommerce key; the row index
+    # keeps the report in Salesforce order and an unmatched row has a null key
+    sf_df = pl.DataFrame(simulated_sf_records, schema=SF_SCHEMA, strict=False).with_row_index()
     
-    for sf_record in simulated_sf_records:
-        sf_payment_id = sf_record.get('Payment ID', '')
-        
-        if sf_payment_id in payment_id_lookup:
-            woo_data = payment_id_lookup[sf_payment_id]
-            fees = float(woo_data.get('fees', 0))
-            matched_by_payment_id += 1
-            total_matched_fees += fees
-            
-            print(f"   ✅ Matched Payment ID {sf_payment_id[:20]}... -> Fee: ${fees:.2f}")
-        else:
-            print(f"   ❌ No match for Payment ID {sf_payment_id[:20]}...")
+    # Later rows win on duplicate keys, as with the lookup dicts
+    woo_by_payment_id = payment_id_df.select(payment_id_key.alias('payment_id'), fee_amount.alias('fees')).unique(
+        'payment_id', keep='last'
+    )
+    payment_id_matches = sf_df.join(
+        woo_by_payment_id, left_on='Payment ID', right_on='payment_id', how='left', coalesce=False
+    ).sort('index')
+    
+    matched_by_payment_id, total_matched_fees = payment_id_matches.select(
+        pl.col('payment_id').is_not_null().sum().alias('matched'),
+        pl.col('fees').fill_null(0.0).sum().alias('fees')
+    ).row(0)
+    
+    # Format the per-record report as a column and write it once
+    sf_payment_id = pl.col('Payment ID').str.slice(0, 20)
+    report_lines = payment_id_matches.select(
+        pl.when(pl.col('payment_id').is_not_null())
+        .then(pl.format(
+            "   ✅ Matched Payment ID {}... -> Fee: ${}",
+            sf_payment_id,
+            pl.col('fees').round(2).cast(pl.Decimal(scale=2)).cast(pl.String)
+        ))
+        .otherwise(pl.format("   ❌ No match for Payment ID {}...", sf_payment_id))
+    ).to_series()
+    if not report_lines.is_empty():
+        print("\n".join(report_lines))
     
     # Test matching by Webstore Order # (current approach)
     print(f"\n7. Testing Order Number matching with simulated Salesforce data...")
     
-    matched_by_order_number = 0
+    woo_by_order_number = order_number_df.select(order_id_key.alias('order_number')).unique()
+    order_number_matches = sf_df.join(
+        woo_by_order_number, left_on='Webstore Order #', right_on='order_number', how='left', coalesce=False
+    ).sort('index')
     
-    for sf_record in simulated_sf_records:
-        sf_order_number = str(sf_record.get('Webstore Order #', ''))
-        
-        if sf_order_number in order_number_lookup:
-            matched_by_order_number += 1
-            print(f"   ✅ Matched Order # {sf_order_number}")
-        else:
-            print(f"   ❌ No match for Order # {sf_order_number}")
+    matched_by_order_number = order_number_matches.get_column('order_number').is_not_null().sum()
+    
+    report_lines = order_number_matches.select(
+        pl.when(pl.col('order_number').is_not_null())
+        .then(pl.format("   ✅ Matched Order # {}", pl.col('Webstore Order #')))
+        .otherwise(pl.format("   ❌ No match for Order # {}", pl.col('Webstore Order #')))
+    ).to_series()
+    if not report_lines.is_empty():
+        print("\n".join(report_lines))
     
     # Results Summary
     print(f"\n{'='*80}")
@@ -201,10 +232,10 @@ def test_payment_id_matching():
     print(f"{'='*80}")
     
     print(f"\n📊 Data Coverage:")
-    print(f"   Total WooCommerce transactions: {len(woo_records)}")
-    print(f"   Transactions with payment_ids: {len(payment_id_lookup)}")
-    print(f"   Transactions with order_ids: {len(order_number_lookup)}")
-    print(f"   Payment ID coverage: {(len(payment_id_lookup) / len(woo_records) * 100):.1f}%")
+    print(f"   Total WooCommerce transactions: {woo_df.height}")
+    print(f"   Transactions with payment_ids: {payment_id_mappings}")
+    print(f"   Transactions with order_ids: {order_number_mappings}")
+    print(f"   Payment ID coverage: {(payment_id_mappings / woo_df.height * 100):.1f}%")
     
     print(f"\n🎯 Matching Accuracy:")
     print(f"   Payment ID matches: {matched_by_payment_id}/{len(simulated_sf_records)}")
@@ -219,13 +250,13 @@ def test_payment_id_matching():
     
     print(f"   Order Number approach:")
     print(f"     - Indirect lookup: order_id -> order_number -> fees")
-    print(f"     - API calls needed: ~{(len(order_number_lookup) // 100) + 1} (for order number fetching)")
+    print(f"     - API calls needed: ~{(order_number_mappings // 100) + 1} (for order number fetching)")
     print(f"     - Lookup complexity: O(1) + API overhead")
     
     # Recommendation
     print(f"\n🚀 RECOMMENDATION:")
     
-    if matched_by_payment_id >= matched_by_order_number and len(payment_id_lookup) > 0:
+    if matched_by_payment_id >= matched_by_order_number and payment_id_mappings > 0:
         print("   ✅ IMPLEMENT PAYMENT_ID MATCHING")
         print("   Reasons:")
         print("   - Equal or better matching accuracy")
@@ -250,4 +281,4 @@ def test_payment_id_matching():
     print(f"{'='*80}")
 
 if __name__ == "__main__":
-    test_payment_id_matching()
\ No newline at end of file
+    pytest.main([__file__, "-v", "-s"])
\ No newline at end of file
@@ -3,29 +3,52 @@
 Performance comparison test: payment_id matching vs order number matching
 Measures time savings and API call reduction
 """
+import asyncio
 import sys
 import time
 import logging
+import tempfile
 from pathlib import Path
+from statistics import median
 
-# Add src to Python path
-sys.path.append(str(Path(__file__).parent / 'src'))
+import polars as pl
 
-from src.services.woocommerce_api import WooCommerceAPI
+# Add the project root to Python path so src.* resolves when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.async_woocommerce_api import AsyncWooCommerceAPI
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def performance_comparison():
-    """Compare performance of payment_id vs order number approaches"""
+# Test 3 times several order lookup requests (up to 100 orders each, the API page
+# limit) and extrapolates from the median rate
+LOOKUP_BATCH_SIZE = 100
+LOOKUP_BATCHES = 3
+
+def transactions_cache_path(date_after, date_before):
+    """Parquet file holding the Test 1 fetch for a date range between runs"""
+    return Path(tempfile.gettempdir()) / f"woo_{date_after}_{date_before}.parquet"
+
+async def performance_comparison(use_cache=False):
+    """Compare performance of payment_id vs order number approaches
+
+    With use_cache, Test 1 reloads a previous run's transactions from Parquet
+    instead of paginating the API, so repeat runs time only the processing.
+    The Test 1 vs Test 2 comparison and recommendation are skipped then.
+    """
     
     print("="*80)
     print("Payment ID vs Order Number Performance Comparison")
     print("="*80)
     
-    # Initialize API
-    woo_api = WooCommerceAPI()
+    # One client (and connection pool) serves every test below
+    async with AsyncWooCommerceAPI() as woo_api:
+        await _run_comparison(woo_api, use_cache)
+
+async def _run_comparison(woo_api, use_cache):
+    """Run the three tests against an open client"""
     
     # Test date range
     date_after = "2025-05-01"
@@ -36,7 +59,7 @@ def performance_comparison():
     
     # Test connection first
     print("\n🔍 Testing API connection...")
-    connection_result = woo_api.test_connection()
+    connection_result = await woo_api.test_connection()
     if not connection_result.get('success'):
         print(f"❌ Connection failed: {connection_result}")
         return
@@ -48,46 +71,75 @@ def performance_comparison():
     print("This simulates the new payment_id matching approach")
     print(f"{'-'*60}")
     
-    start_time = time.time()
+    cache_path = transactions_cache_path(date_after, date_before)
+    start_time = time.perf_counter()
     
-    df_payment_id_approach = woo_api.get_all_transactions(
-        date_after=date_after,
-        date_before=date_before,
-        fetch_order_numbers=False  # Skip order number lookups
-    )
+    from_cache = use_cache and cache_path.exists()
+    if from_cache:
+        df_payment_id_approach = pl.read_parquet(cache_path)
+    else:
+        df_payment_id_approach = await woo_api.get_all_transactions(
+            date_after=date_after,
+            date_before=date_before,
+            fetch_order_numbers=False  # Skip order number lookups
+        )
+    
+    time_payment_id = time.perf_counter() - start_time
     
-    time_payment_id = time.time() - start_time
+    # Refresh the cache after every live fetch so a later --use-cache run can reuse it
+    if not from_cache and df_payment_id_approach is not None:
+        df_payment_id_approach.write_parquet(cache_path)
     
     if df_payment_id_approach is not None:
         print(f"✅ SUCCESS: {len(df_payment_id_approach)} transactions")
+        if from_cache:
+            print(f"   Loaded from cache: {cache_path}")
         print(f"   Time taken: {time_payment_id:.2f} seconds")
         print(f"   Rate: {len(df_payment_id_approach) / time_payment_id:.1f} transactions/second")
         
         # Check payment_id availability
+        pi_count = 0
         if 'payment_id' in df_payment_id_approach.columns:
-            payment_ids = df_payment_id_approach['payment_id'].to_list()
-            pi_count = sum(1 for pid in payment_ids if pid and str(pid).startswith('pi_'))
+            pi_count = df_payment_id_approach.select(
+                pl.col('payment_id').cast(pl.String).str.starts_with('pi_').sum()
+            ).item()
             print(f"   Valid payment_ids (pi_*): {pi_count}")
             print(f"   Payment ID coverage: {(pi_count / len(df_payment_id_approach) * 100):.1f}%")
     else:
         print("❌ FAILED: Could not fetch transactions")
         return
     
+    # Without Stripe payment IDs payment_id matching can never be recommended,
+    # so the slow order number lookups in Tests 2 and 3 are not worth running
+    if pi_count == 0:
+        print("\n⚠️  No pi_* payment IDs present; skipping order-number comparison")
+        return
+    
+    # Numeric order IDs stay a Series; Python ints are only made for the lookup calls
+    order_ids = pl.Series('order_id', [], dtype=pl.Int64)
+    if 'order_id' in df_payment_id_approach.columns:
+        order_ids = df_payment_id_approach.get_column('order_id')
+        if order_ids.dtype != pl.Int64:
+            # Non-numeric IDs become null in the cast and are dropped
+            order_ids = order_ids.cast(pl.Int64, strict=False)
+        order_ids = order_ids.drop_nulls()
+    
     # Performance Test 2: WITH order number fetching (SLOW - Current approach)
     print(f"\n{'-'*60}")
     print("TEST 2: Order Number Approach (fetch_order_numbers=True)")
     print("This is the current order number matching approach")
     print(f"{'-'*60}")
     
-    start_time = time.time()
+    # An independent fetch, so the integrity check below compares two API results
+    start_time = time.perf_counter()
     
-    df_order_number_approach = woo_api.get_all_transactions(
+    df_order_number_approach = await woo_api.get_all_transactions(
         date_after=date_after,
         date_before=date_before,
-        fetch_order_numbers=True  # Fetch order numbers (adds API calls)
+        fetch_order_numbers=True  # Batched order number lookups
     )
     
-    time_order_number = time.time() - start_time
+    time_order_number = time.perf_counter() - start_time
     
     if df_order_number_approach is not None:
         print(f"✅ SUCCESS: {len(df_order_number_approach)} transactions")
@@ -96,8 +148,10 @@ def performance_comparison():
         
         # Check order_number availability
         if 'order_number' in df_order_number_approach.columns:
-            order_numbers = df_order_number_approach['order_number'].to_list()
-            valid_orders = sum(1 for on in order_numbers if on and str(on) != '0')
+            order_number = pl.col('order_number').cast(pl.String)
+            valid_orders = df_order_number_approach.select(
+                (order_number.is_not_null() & ~order_number.is_in(['', '0'])).sum()
+            ).item()
             print(f"   Valid order_numbers: {valid_orders}")
             print(f"   Order number coverage: {(valid_orders / len(df_order_number_approach) * 100):.1f}%")
     else:
@@ -122,8 +176,12 @@ def performance_comparison():
         fees_match = abs(fees1 - fees2) < 0.01
         print(f"   Total fees match: {fees_match} (${fees1:.2f} vs ${fees2:.2f})")
     
-    # Performance metrics
-    if data_integrity_ok and time_payment_id > 0 and time_order_number > 0:
+    # Performance metrics; a cached Test 1 timed a Parquet read rather than the API
+    # fetch, so comparing it with Test 2 would overstate the improvement
+    if from_cache:
+        print(f"\n⚠️  Test 1 was loaded from cache; skipping the timing comparison and recommendation")
+        print(f"   Run without --use-cache to compare the two approaches")
+    elif data_integrity_ok and time_payment_id > 0 and time_order_number > 0:
         time_saved = time_order_number - time_payment_id
         percent_improvement = (time_saved / time_order_number) * 100
         speedup_factor = time_order_number / time_payment_id
@@ -135,13 +193,13 @@ def performance_comparison():
         print(f"   Performance improvement: {percent_improvement:.1f}% faster")
         print(f"   Speedup factor: {speedup_factor:.1f}x")
         
-        # Estimate API call savings
+        # Estimate API call savings: one /orders request per 100 unique orders
         if df_order_number_approach is not None:
-            unique_orders = len(df_order_number_approach)
-            estimated_api_calls_saved = (unique_orders // 100) + 1  # Batch size is 100
+            unique_orders = order_ids.n_unique()
+            estimated_api_calls_saved = -(-unique_orders // 100)
             print(f"\n📡 API Call Reduction:")
             print(f"   Estimated order lookup API calls saved: {estimated_api_calls_saved}")
-            print(f"   API calls per transaction (current): {estimated_api_calls_saved / unique_orders:.3f}")
+            print(f"   API calls per transaction (current): {estimated_api_calls_saved / len(df_order_number_approach):.3f}")
             print(f"   API calls per transaction (new): 0 (payment_id is already included)")
         
         # ROI Analysis
@@ -167,20 +225,31 @@ def performance_comparison():
     print(f"{'-'*60}")
     
     if df_payment_id_approach is not None and 'order_id' in df_payment_id_approach.columns:
-        order_ids = [int(oid) for oid in df_payment_id_approach['order_id'].to_list() if oid and str(oid).isdigit()]
-        
-        if order_ids:
-            print(f"   Testing order lookup for {len(order_ids)} orders...")
+        # The lookup deduplicates IDs, so batch over unique orders to time real work
+        unique_order_ids = order_ids.unique(maintain_order=True)
+        if not unique_order_ids.is_empty():
+            print(f"   Testing order lookup for {len(unique_order_ids)} orders...")
+            
+            batches = [
+                unique_order_ids.slice(i, LOOKUP_BATCH_SIZE).to_list()
+                for i in range(0, min(len(unique_order_ids), LOOKUP_BATCH_SIZE * LOOKUP_BATCHES), LOOKUP_BATCH_SIZE)
+            ]
             
-            start_time = time.time()
-            order_lookup_result = woo_api._get_order_numbers_for_transactions(order_ids[:50])  # Test with first 50
-            lookup_time = time.time() - start_time
+            # Time each batch separately; the median per-order cost smooths out a slow
+            # first batch (connection warm-up) or a single network hiccup
+            batch_rates = []
+            for batch in batches:
+                start_time = time.perf_counter()
+                await woo_api.get_order_numbers(batch)
+                batch_rates.append((time.perf_counter() - start_time) / len(batch))
+            seconds_per_order = median(batch_rates)
             
-            print(f"   Order lookup time (50 orders): {lookup_time:.2f} seconds")
-            print(f"   Rate: {50 / lookup_time:.1f} orders/second")
+            print(f"   Order lookup time ({len(batches)} batches of up to {LOOKUP_BATCH_SIZE} orders): "
+                  f"{seconds_per_order * 1000:.1f} ms/order (median)")
+            print(f"   Rate: {1 / seconds_per_order:.1f} orders/second")
             
-            # Extrapolate for full dataset
-            estimated_full_lookup_time = (len(order_ids) / 50) * lookup_time
+            # Extrapolate for full dataset, one batch after another
+            estimated_full_lookup_time = seconds_per_order * len(unique_order_ids)
             print(f"   Estimated full lookup time: {estimated_full_lookup_time:.2f} seconds")
     
     print(f"\n{'='*80}")
@@ -188,4 +257,4 @@ def performance_comparison():
     print(f"{'='*80}")
 
 if __name__ == "__main__":
-    performance_comparison()
\ No newline at end of file
+    asyncio.run(performance_comparison(use_cache='--use-cache' in sys.argv[1:]))
\ No newline at end of file
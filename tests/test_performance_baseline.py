@@ -3,74 +3,198 @@
 Performance baseline testing for API operations
 Measures current performance before optimizations
 """
+import asyncio
 import sys
-import os
 import time
 import logging
 import json
+import threading
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, Any, List
-import statistics
 
-# Add the src directory to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+import numpy as np
+import pytest
 
-from services.salesforce_api import SalesforceAPI
-from services.woocommerce_api import WooCommerceAPI
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Results are written with the stdlib json encoder instead
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None  # Stats fall back to plain NumPy without numba
+    prange = range
+
+# Add the project root to Python path so src.* resolves when run as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.async_jwt_salesforce_api import AsyncJWTSalesforceAPI
+from src.services.async_woocommerce_api import AsyncWooCommerceAPI
 
 # Set up logging
 logging.basicConfig(level=logging.WARNING)  # Reduce noise for performance testing
 logger = logging.getLogger(__name__)
 
+# Above this many uncached samples, the summary computes every operation's stats in one parallel kernel call
+PARALLEL_STATS_THRESHOLD = 1000
+
+def _duration_stats(durations):
+    """Return (min, max, mean, median, total) of a float64 duration array"""
+    total = durations.sum()
+    return durations.min(), durations.max(), total / durations.size, np.median(durations), total
+
+def _segment_stats(durations, offsets):
+    """Return one (min, max, mean, median, total) row per durations[offsets[i]:offsets[i + 1]]"""
+    out = np.empty((offsets.size - 1, 5))
+    for i in prange(offsets.size - 1):
+        segment = durations[offsets[i]:offsets[i + 1]]
+        total = segment.sum()
+        out[i, 0] = segment.min()
+        out[i, 1] = segment.max()
+        out[i, 2] = total / segment.size
+        out[i, 3] = np.median(segment)
+        out[i, 4] = total
+    return out
+
+if njit is not None:
+    _duration_stats = njit(cache=True)(_duration_stats)
+    _segment_stats = njit(parallel=True, cache=True)(_segment_stats)
+
 class PerformanceTracker:
-    """Track and analyze performance metrics"""
+    """Track and analyze performance metrics
+    
+    Safe to share between threads: timers are keyed by (thread, operation) and
+    recorded metrics are guarded by a lock. Calls that overlap on one event loop
+    time themselves and report through record().
+    """
     
     def __init__(self):
         self.metrics = {}
         self.start_times = {}
+        self._stats_cache = {}
+        self._summary = None
+        self._lock = threading.Lock()
     
     def start_timer(self, operation: str):
         """Start timing an operation"""
-        self.start_times[operation] = time.time()
+        self.start_times[(threading.get_ident(), operation)] = time.perf_counter_ns()
     
     def end_timer(self, operation: str, additional_data: Dict = None):
         """End timing an operation and record metrics"""
-        if operation not in self.start_times:
+        end_ns = time.perf_counter_ns()
+        start_ns = self.start_times.pop((threading.get_ident(), operation), None)
+        if start_ns is None:
             return
         
-        duration = time.time() - self.start_times[operation]
-        
-        if operation not in self.metrics:
-            self.metrics[operation] = []
+        return self.record(operation, end_ns - start_ns, additional_data)
+    
+    def record(self, operation: str, duration_ns: int, additional_data: Dict = None):
+        """Record a duration the caller measured with perf_counter_ns"""
+        # Integer nanoseconds from the monotonic counter; seconds are derived for reporting
+        duration = duration_ns / 1e9
         
         metric = {
             'duration': duration,
-            'timestamp': datetime.now().isoformat()
+            'duration_ns': duration_ns,
+            'timestamp_epoch': time.time()  # Formatted to ISO only when saving
         }
         
         if additional_data:
             metric.update(additional_data)
         
-        self.metrics[operation].append(metric)
-        del self.start_times[operation]
+        with self._lock:
+            self.metrics.setdefault(operation, []).append(metric)
+            self._stats_cache.pop(operation, None)
+            self._summary = None
         
         return duration
     
+    def warmup(self, operation: str, fn):
+        """Run fn once as a cold call recorded under '<operation>_cold'
+        
+        Keeps one-time costs (connection setup, auth, first-call compilation)
+        out of the operation's own stats. Returns fn's result.
+        """
+        self.start_timer(f'{operation}_cold')
+        result = fn()
+        self.end_timer(f'{operation}_cold')
+        return result
+    
+    async def warmup_async(self, operation: str, fn):
+        """Async counterpart of warmup: awaits fn() as the cold call"""
+        start_ns = time.perf_counter_ns()
+        result = await fn()
+        self.record(f'{operation}_cold', time.perf_counter_ns() - start_ns)
+        return result
+    
     def get_stats(self, operation: str) -> Dict:
         """Get statistics for an operation"""
-        if operation not in self.metrics:
-            return {}
+        with self._lock:
+            if operation not in self.metrics:
+                return {}
+            
+            if operation in self._stats_cache:
+                return self._stats_cache[operation]
+            
+            metrics = list(self.metrics[operation])
         
-        durations = [m['duration'] for m in self.metrics[operation]]
+        durations = np.fromiter((m['duration'] for m in metrics), dtype=np.float64, count=len(metrics))
+        return self._store_stats(operation, metrics, _duration_stats(durations))
+    
+    def get_all_stats(self) -> Dict[str, Dict]:
+        """Get statistics for every operation
+        
+        With numba available and many uncached samples, all pending operations
+        are computed together by one parallel kernel over the flattened durations.
+        """
+        with self._lock:
+            snapshot = {operation: list(metrics) for operation, metrics in self.metrics.items()}
+        pending = {
+            operation: metrics for operation, metrics in snapshot.items()
+            if operation not in self._stats_cache
+        }
         
-        return {
-            'count': len(durations),
-            'min': min(durations),
-            'max': max(durations),
-            'mean': statistics.mean(durations),
-            'median': statistics.median(durations),
-            'total': sum(durations)
+        sample_count = sum(len(metrics) for metrics in pending.values())
+        if njit is not None and sample_count > PARALLEL_STATS_THRESHOLD:
+            offsets = np.zeros(len(pending) + 1, dtype=np.int64)
+            np.cumsum([len(metrics) for metrics in pending.values()], out=offsets[1:])
+            durations = np.fromiter(
+                (m['duration'] for metrics in pending.values() for m in metrics),
+                dtype=np.float64,
+                count=sample_count
+            )
+            for (operation, metrics), values in zip(pending.items(), _segment_stats(durations, offsets)):
+                self._store_stats(operation, metrics, values)
+        
+        return {operation: self.get_stats(operation) for operation in snapshot}
+    
+    def get_summary(self) -> Dict[str, Dict]:
+        """Stats for every operation, built once and shared by print_summary and save_results"""
+        summary = self._summary
+        if summary is None:
+            summary = self._summary = self.get_all_stats()
+        return summary
+    
+    def _store_stats(self, operation: str, metrics: List[Dict], values) -> Dict:
+        """Build the stats dict from (min, max, mean, median, total) and cache it"""
+        minimum, maximum, mean, median, total = values
+        stats = {
+            'count': len(metrics),
+            'min': float(minimum),
+            'max': float(maximum),
+            'mean': float(mean),
+            'median': float(median),
+            'total': float(total)
         }
+        
+        with self._lock:
+            # Only cache if nothing was recorded for the operation meanwhile
+            if len(self.metrics[operation]) == len(metrics):
+                self._stats_cache[operation] = stats
+        
+        return stats
     
     def print_summary(self):
         """Print performance summary"""
@@ -80,8 +204,7 @@ class PerformanceTracker:
         
         total_time = 0
         
-        for operation, metrics in self.metrics.items():
-            stats = self.get_stats(operation)
+        for operation, stats in self.get_summary().items():
             total_time += stats.get('total', 0)
             
             print(f"\n{operation.upper()}:")
@@ -94,20 +217,43 @@ class PerformanceTracker:
         
         print(f"\nOVERALL TOTAL TIME: {total_time:.3f}s")
     
-    def save_results(self, filename: str):
-        """Save results to JSON file"""
+    @staticmethod
+    def _serializable_metric(metric: Dict) -> Dict:
+        """Copy of a metric with its epoch timestamp rendered as an ISO string"""
+        result = {key: value for key, value in metric.items() if key != 'timestamp_epoch'}
+        result['timestamp'] = datetime.fromtimestamp(metric['timestamp_epoch']).isoformat()
+        return result
+    
+    def save_results(self, filename: str, now: datetime = None):
+        """Save results to JSON file
+        
+        Pass the datetime used to name the file as now so the two agree.
+        """
+        path = Path(filename)
         results = {
-            'timestamp': datetime.now().isoformat(),
-            'metrics': self.metrics,
-            'summary': {op: self.get_stats(op) for op in self.metrics.keys()}
+            'timestamp': (now or datetime.now()).isoformat(),
+            'metrics': {
+                operation: [self._serializable_metric(metric) for metric in metrics]
+                for operation, metrics in self.metrics.items()
+            },
+            'summary': self.get_summary()
         }
         
-        with open(filename, 'w') as f:
-            json.dump(results, f, indent=2)
+        # Serialize in one call and write the bytes once, rather than json.dump's many small writes
+        if orjson is not None:
+            payload = orjson.dumps(
+                results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY, default=str
+            )
+        else:
+            payload = json.dumps(results, indent=2, default=str).encode('utf-8')
+        
+        # A 1 MiB buffer keeps typical result files to a single write() at close
+        with path.open('wb', buffering=1 << 20) as f:
+            f.write(payload)
         
-        print(f"\n✓ Performance results saved to {filename}")
+        print(f"\n✓ Performance results saved to {path}")
 
-def test_salesforce_performance(tracker: PerformanceTracker):
+async def run_salesforce_performance(tracker: PerformanceTracker):
     """Test Salesforce API performance"""
     print("=" * 60)
     print("SALESFORCE PERFORMANCE TESTING")
@@ -116,73 +262,69 @@ def test_salesforce_performance(tracker: PerformanceTracker):
     try:
         # Initialize and connect
         tracker.start_timer('sf_init')
-        sf_api = SalesforceAPI()
+        sf_api = AsyncJWTSalesforceAPI()
         tracker.end_timer('sf_init')
         
-        # Test connection (multiple times for consistency)
-        connection_times = []
-        for i in range(3):
-            tracker.start_timer('sf_connection')
-            result = sf_api.test_connection()
-            duration = tracker.end_timer('sf_connection', {'success': result['success']})
-            connection_times.append(duration)
-            
-            if not result['success']:
-                print(f"✗ Connection test {i+1} failed")
-                return False
+        async with sf_api:
+            # Test connection (multiple times for consistency); the cold call authenticates
+            await tracker.warmup_async('sf_connection', sf_api.test_connection)
+            connection_times = []
+            for i in range(3):
+                tracker.start_timer('sf_connection')
+                result = await sf_api.test_connection()
+                duration = tracker.end_timer('sf_connection', {'success': result['success']})
+                connection_times.append(duration)
+                
+                if not result['success']:
+                    print(f"✗ Connection test {i+1} failed")
+                    return False
+                
+                print(f"✓ Connection test {i+1}: {duration:.3f}s")
             
-            print(f"✓ Connection test {i+1}: {duration:.3f}s")
-        
-        # Test reports retrieval (multiple times)
-        for i in range(2):
-            tracker.start_timer('sf_reports')
-            reports = sf_api.get_reports()
-            duration = tracker.end_timer('sf_reports', {'count': len(reports)})
-            print(f"✓ Reports retrieval {i+1}: {duration:.3f}s ({len(reports)} reports)")
-        
-        # Test report data retrieval (if reports available)
-        if reports:
-            # Try to get the sales receipt report
-            target_report_id = "00ORl000007JNmTMAW"
-            target_report = None
+            # Test reports retrieval (multiple times)
+            await tracker.warmup_async('sf_reports', sf_api.get_reports)
+            for i in range(2):
+                tracker.start_timer('sf_reports')
+                reports = await sf_api.get_reports()
+                duration = tracker.end_timer('sf_reports', {'count': len(reports)})
+                print(f"✓ Reports retrieval {i+1}: {duration:.3f}s ({len(reports)} reports)")
             
-            for report in reports:
-                if report.get('id') == target_report_id:
-                    target_report = report
-                    break
+            # Test report data retrieval (if reports available)
+            if reports:
+                # Try to get the sales receipt report
+                target_report_id = "00ORl000007JNmTMAW"
+                reports_by_id = {report.get('id'): report for report in reports}
+                target_report = reports_by_id.get(target_report_id) or reports[0]
+                
+                if target_report:
+                    for i in range(2):
+                        tracker.start_timer('sf_report_data')
+                        report_data = await sf_api.get_report_data(target_report['id'])
+                        rows = len(report_data) if report_data is not None else 0
+                        cols = len(report_data.columns) if report_data is not None else 0
+                        duration = tracker.end_timer('sf_report_data', {
+                            'report_id': target_report['id'],
+                            'rows': rows,
+                            'columns': cols
+                        })
+                        print(f"✓ Report data {i+1}: {duration:.3f}s ({rows} rows, {cols} cols)")
             
-            if not target_report and reports:
-                target_report = reports[0]
+            # Test SOQL queries (multiple times)
+            test_queries = [
+                "SELECT Id, Name FROM Organization LIMIT 1",
+                "SELECT Id, Name FROM Account LIMIT 5",
+                "SELECT Id, Subject FROM Report LIMIT 10"
+            ]
             
-            if target_report:
-                for i in range(2):
-                    tracker.start_timer('sf_report_data')
-                    report_data = sf_api.get_report_data(target_report['id'])
-                    rows = len(report_data) if report_data is not None else 0
-                    cols = len(report_data.columns) if report_data is not None else 0
-                    duration = tracker.end_timer('sf_report_data', {
-                        'report_id': target_report['id'],
-                        'rows': rows,
-                        'columns': cols
-                    })
-                    print(f"✓ Report data {i+1}: {duration:.3f}s ({rows} rows, {cols} cols)")
-        
-        # Test SOQL queries (multiple times)
-        test_queries = [
-            "SELECT Id, Name FROM Organization LIMIT 1",
-            "SELECT Id, Name FROM Account LIMIT 5",
-            "SELECT Id, Subject FROM Report LIMIT 10"
-        ]
-        
-        for query in test_queries:
-            tracker.start_timer('sf_soql')
-            result = sf_api.execute_soql(query)
-            rows = len(result) if result is not None else 0
-            duration = tracker.end_timer('sf_soql', {
-                'query': query[:50],
-                'rows': rows
-            })
-            print(f"✓ SOQL query: {duration:.3f}s ({rows} rows)")
+            for query in test_queries:
+                tracker.start_timer('sf_soql')
+                result = await sf_api.execute_soql(query)
+                rows = len(result) if result is not None else 0
+                duration = tracker.end_timer('sf_soql', {
+                    'query': query[:50],
+                    'rows': rows
+                })
+                print(f"✓ SOQL query: {duration:.3f}s ({rows} rows)")
         
         return True
         
@@ -192,7 +334,7 @@ def test_salesforce_performance(tracker: PerformanceTracker):
         traceback.print_exc()
         return False
 
-def test_woocommerce_performance(tracker: PerformanceTracker):
+async def run_woocommerce_performance(tracker: PerformanceTracker):
     """Test WooCommerce API performance"""
     print("\n" + "=" * 60)
     print("WOOCOMMERCE PERFORMANCE TESTING")
@@ -201,66 +343,99 @@ def test_woocommerce_performance(tracker: PerformanceTracker):
     try:
         # Initialize
         tracker.start_timer('woo_init')
-        woo_api = WooCommerceAPI()
+        woo_api = AsyncWooCommerceAPI()
         tracker.end_timer('woo_init')
         
-        # Test connection (multiple times)
-        for i in range(3):
-            tracker.start_timer('woo_connection')
-            try:
-                response = woo_api.wc_api.get("products", params={"per_page": 1})
-                success = response.status_code == 200
-                duration = tracker.end_timer('woo_connection', {'success': success})
-                print(f"✓ Connection test {i+1}: {duration:.3f}s")
-            except Exception as e:
-                duration = tracker.end_timer('woo_connection', {'success': False})
-                print(f"✗ Connection test {i+1} failed: {duration:.3f}s")
-        
-        # Test orders retrieval with different date ranges
-        date_ranges = [
-            (datetime.now() - timedelta(days=7), datetime.now()),   # Last 7 days
-            (datetime.now() - timedelta(days=30), datetime.now()),  # Last 30 days
-        ]
-        
-        for i, (start_date, end_date) in enumerate(date_ranges):
-            tracker.start_timer('woo_orders')
-            orders = woo_api.get_orders(
-                start_date=start_date,
-                end_date=end_date,
-                limit=50
-            )
-            duration = tracker.end_timer('woo_orders', {
-                'date_range_days': (end_date - start_date).days,
-                'count': len(orders)
-            })
-            print(f"✓ Orders retrieval {i+1}: {duration:.3f}s ({len(orders)} orders, {(end_date - start_date).days} days)")
-        
-        # Test payments retrieval
-        for i, (start_date, end_date) in enumerate(date_ranges):
-            tracker.start_timer('woo_payments')
-            payments = woo_api.get_payments_paginated(
-                start_date=start_date,
-                end_date=end_date,
-                limit=50
+        async with woo_api:
+            # Test connection (multiple times)
+            await tracker.warmup_async('woo_connection', woo_api.test_connection)
+            for i in range(3):
+                tracker.start_timer('woo_connection')
+                result = await woo_api.test_connection()
+                duration = tracker.end_timer('woo_connection', {'success': result['success']})
+                if result['success']:
+                    print(f"✓ Connection test {i+1}: {duration:.3f}s")
+                else:
+                    print(f"✗ Connection test {i+1} failed: {duration:.3f}s")
+            
+            now = datetime.now()
+            date_ranges = [
+                (now - timedelta(days=7), now),   # Last 7 days
+                (now - timedelta(days=30), now),  # Last 30 days
+            ]
+            
+            fetch_limit = 50
+            
+            async def timed_fetch(operation, fetch, additional_data):
+                """Await one fetch, timing it into the tracker; returns (result, duration)"""
+                start_ns = time.perf_counter_ns()
+                result = await fetch
+                count = len(result) if result is not None else 0
+                duration = tracker.record(operation, time.perf_counter_ns() - start_ns,
+                                          {**additional_data, 'count': count})
+                return result, duration
+            
+            def created_at(order):
+                """Order creation time as a naive local datetime, comparable with now"""
+                created = datetime.fromisoformat(order['date_created'])
+                if created.tzinfo is not None:
+                    created = created.astimezone().replace(tzinfo=None)
+                return created
+            
+            # The orders endpoint has no date filter on this client, so the newest
+            # orders are fetched once and each date range is filtered locally. The
+            # independent order and payment requests share the one client concurrently.
+            (orders_df, orders_duration), *payment_results = await asyncio.gather(
+                timed_fetch('woo_orders', woo_api.get_orders(per_page=fetch_limit), {}),
+                *(
+                    timed_fetch('woo_payments', woo_api.get_all_transactions(
+                        date_after=f"{start_date:%Y-%m-%d}",
+                        date_before=f"{end_date:%Y-%m-%d}",
+                        fetch_order_numbers=False
+                    ), {'date_range_days': (end_date - start_date).days})
+                    for start_date, end_date in date_ranges
+                )
             )
-            duration = tracker.end_timer('woo_payments', {
-                'date_range_days': (end_date - start_date).days,
-                'count': len(payments)
-            })
-            print(f"✓ Payments retrieval {i+1}: {duration:.3f}s ({len(payments)} payments)")
-        
-        # Test order lookup if we have orders
-        if 'orders' in locals() and orders:
-            order_numbers = [order.get('number', '') for order in orders[:10] if order.get('number')]
             
-            if order_numbers:
+            orders = orders_df.to_dicts() if orders_df is not None else []
+            print(f"✓ Orders retrieval: {orders_duration:.3f}s ({len(orders)} orders)")
+            
+            # A full page may have been cut off at the limit, so a range is only
+            # complete if it starts after the oldest order that was returned
+            created_times = [created_at(order) for order in orders if order.get('date_created')]
+            orders_complete = len(orders) < fetch_limit
+            oldest_fetched = min(created_times) if created_times else None
+            
+            for i, (start_date, end_date) in enumerate(date_ranges):
+                days = (end_date - start_date).days
+                if not orders_complete and (oldest_fetched is None or start_date < oldest_fetched):
+                    print(f"  Orders capped at {fetch_limit}; the {days}-day range reaches past them, skipping subset {i+1}")
+                    continue
+                
+                tracker.start_timer('woo_orders_subset')
+                range_orders = [created for created in created_times if start_date <= created <= end_date]
+                duration = tracker.end_timer('woo_orders_subset', {
+                    'date_range_days': days,
+                    'count': len(range_orders)
+                })
+                print(f"✓ Orders subset {i+1}: {duration:.3f}s ({len(range_orders)} orders, {days} days)")
+            
+            # Test payments retrieval
+            for i, (payments, duration) in enumerate(payment_results):
+                count = len(payments) if payments is not None else 0
+                print(f"✓ Payments retrieval {i+1}: {duration:.3f}s ({count} payments)")
+            
+            # Test order lookup if we have orders
+            order_ids = [order['id'] for order in orders[:10] if order.get('id')]
+            
+            if order_ids:
                 tracker.start_timer('woo_order_lookup')
-                lookup_results = woo_api.get_order_numbers_to_ids(order_numbers)
+                lookup_results = await woo_api.get_order_numbers(order_ids)
                 duration = tracker.end_timer('woo_order_lookup', {
-                    'input_count': len(order_numbers),
+                    'input_count': len(order_ids),
                     'result_count': len(lookup_results)
                 })
-                print(f"✓ Order lookup: {duration:.3f}s ({len(order_numbers)} -> {len(lookup_results)})")
+                print(f"✓ Order lookup: {duration:.3f}s ({len(order_ids)} -> {len(lookup_results)})")
         
         return True
         
@@ -270,7 +445,7 @@ def test_woocommerce_performance(tracker: PerformanceTracker):
         traceback.print_exc()
         return False
 
-def test_data_processing_performance(tracker: PerformanceTracker):
+def run_data_processing_performance(tracker: PerformanceTracker):
     """Test data processing performance"""
     print("\n" + "=" * 60)
     print("DATA PROCESSING PERFORMANCE TESTING")
@@ -278,7 +453,7 @@ def test_data_processing_performance(tracker: PerformanceTracker):
     
     try:
         import polars as pl
-        from ui.operations.sales_receipt_import import SalesReceiptImport
+        from src.ui.operations.sales_receipt_import import SalesReceiptImport
         
         # Initialize operation
         tracker.start_timer('data_proc_init')
@@ -293,34 +468,41 @@ def test_data_processing_performance(tracker: PerformanceTracker):
             
             # Generate test data
             tracker.start_timer('data_generation')
-            test_data = {
-                'Account Name': [f'Test Account {i}' for i in range(size)],
-                'Date Paid': ['2024-01-15'] * size,
-                'Webstore Order #': [f'WOO-{i:05d}' for i in range(size)],
-                'Class': ['02 - Sales'] * size,
-                'SKU': [f'TEST-SKU-{i}' for i in range(size)],
-                'Product Type': ['Standard Product'] * size,
-                'Quantity': [1] * size,
-                'Unit Price': ['100.00'] * size,
-                'Tax': [8.25] * size,
-                'Order Amount (Grand Total)': ['108.25'] * size,
-                'Payment ID': [f'pi_test{i}' for i in range(size)],
-                'Shipping Country': ['United States'] * size,
-                'Billing Address Line 1': ['123 Main St'] * size,
-                'Billing City': ['New York'] * size,
-                'Billing State/Province (text only)': ['NY'] * size,
-                'Billing Zip/Postal Code': ['10001'] * size,
-                'Shipping Address Line 1': ['123 Main St'] * size,
-                'Shipping City': ['New York'] * size,
-                'Shipping State/Province (text only)': ['NY'] * size,
-                'Shipping Zip/Postal Code': ['10001'] * size,
-                'Sales Tax (Reason)': ['NY Sales Tax'] * size
-            }
-            
-            df = pl.DataFrame(test_data)
+            # Built inside Polars: the row index is cast to text once and each indexed
+            # column prefixes it, and constant columns are repeated, so no per-row
+            # Python objects exist
+            row = pl.lit(pl.int_range(0, size, dtype=pl.Int64, eager=True).cast(pl.String))
+            df = pl.select(
+                (pl.lit('Test Account ') + row).alias('Account Name'),
+                pl.repeat('2024-01-15', size).alias('Date Paid'),
+                (pl.lit('WOO-') + row.str.zfill(5)).alias('Webstore Order #'),
+                pl.repeat('02 - Sales', size).alias('Class'),
+                (pl.lit('TEST-SKU-') + row).alias('SKU'),
+                pl.repeat('Standard Product', size).alias('Product Type'),
+                pl.repeat(1, size, dtype=pl.Int64).alias('Quantity'),
+                pl.repeat('100.00', size).alias('Unit Price'),
+                pl.repeat(8.25, size, dtype=pl.Float64).alias('Tax'),
+                pl.repeat('108.25', size).alias('Order Amount (Grand Total)'),
+                (pl.lit('pi_test') + row).alias('Payment ID'),
+                pl.repeat('United States', size).alias('Shipping Country'),
+                pl.repeat('123 Main St', size).alias('Billing Address Line 1'),
+                pl.repeat('New York', size).alias('Billing City'),
+                pl.repeat('NY', size).alias('Billing State/Province (text only)'),
+                pl.repeat('10001', size).alias('Billing Zip/Postal Code'),
+                pl.repeat('123 Main St', size).alias('Shipping Address Line 1'),
+                pl.repeat('New York', size).alias('Shipping City'),
+                pl.repeat('NY', size).alias('Shipping State/Province (text only)'),
+                pl.repeat('10001', size).alias('Shipping Zip/Postal Code'),
+                pl.repeat('NY Sales Tax', size).alias('Sales Tax (Reason)')
+            )
             duration = tracker.end_timer('data_generation', {'rows': size})
             print(f"  ✓ Data generation: {duration:.3f}s")
             
+            # Warm each stage once at this size so the timed calls below are steady-state
+            tracker.warmup('data_validation', lambda: operation._validate_data(df))
+            warm_df = tracker.warmup('data_filtering', lambda: operation._filter_rows(df))
+            tracker.warmup('data_transformations', lambda: operation._apply_transformations(warm_df))
+            
             # Test validation
             tracker.start_timer('data_validation')
             errors = operation._validate_data(df)
@@ -346,6 +528,26 @@ def test_data_processing_performance(tracker: PerformanceTracker):
                 'rows': len(filtered_df)
             })
             print(f"  ✓ Data transformations: {duration:.3f}s")
+            
+            # Test the same filter + transform chain as one lazy plan; the
+            # transformations fuse into the single collect instead of materializing
+            def run_lazy_pipeline():
+                return (
+                    df.lazy()
+                    .pipe(operation._filter_rows_lazy)
+                    .pipe(operation._apply_transformations_lazy)
+                    .collect()
+                )
+            
+            tracker.warmup('data_pipeline_lazy', run_lazy_pipeline)
+            tracker.start_timer('data_pipeline_lazy')
+            lazy_result_df = run_lazy_pipeline()
+            duration = tracker.end_timer('data_pipeline_lazy', {
+                'input_rows': size,
+                'output_rows': len(lazy_result_df)
+            })
+            print(f"  ✓ Lazy filter + transformations: {duration:.3f}s ({size} -> {len(lazy_result_df)} rows, "
+                  f"matches eager: {lazy_result_df.equals(transformed_df)})")
         
         return True
         
@@ -365,25 +567,19 @@ def main():
     tracker = PerformanceTracker()
     all_success = True
     
-    # Test Salesforce performance
-    success = test_salesforce_performance(tracker)
-    all_success &= success
-    
-    # Test WooCommerce performance
-    success = test_woocommerce_performance(tracker)
-    all_success &= success
-    
-    # Test data processing performance
-    success = test_data_processing_performance(tracker)
-    all_success &= success
+    # Run the suites one after another, so each one's latencies are measured
+    # without the other's load and its output is not interleaved
+    all_success &= asyncio.run(run_salesforce_performance(tracker))
+    all_success &= asyncio.run(run_woocommerce_performance(tracker))
+    all_success &= run_data_processing_performance(tracker)
     
     # Print summary
     tracker.print_summary()
     
     # Save results
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"performance_baseline_{timestamp}.json"
-    tracker.save_results(filename)
+    now = datetime.now()
+    filename = f"performance_baseline_{now:%Y%m%d_%H%M%S}.json"
+    tracker.save_results(filename, now=now)
     
     # Final results
     print("\n" + "=" * 70)
@@ -398,5 +594,26 @@ def main():
     
     return all_success
 
+@pytest.fixture
+def tracker():
+    """A fresh tracker per suite"""
+    return PerformanceTracker()
+
+def test_salesforce_performance(tracker):
+    """Salesforce suite; skipped without JWT credentials"""
+    if not AsyncJWTSalesforceAPI().has_credentials():
+        pytest.skip("Salesforce JWT credentials not configured")
+    assert asyncio.run(run_salesforce_performance(tracker))
+
+def test_woocommerce_performance(tracker):
+    """WooCommerce suite; skipped without API credentials"""
+    if not AsyncWooCommerceAPI().has_credentials():
+        pytest.skip("WooCommerce credentials not configured")
+    assert asyncio.run(run_woocommerce_performance(tracker))
+
+def test_data_processing_performance(tracker):
+    """Data processing suite"""
+    assert run_data_processing_performance(tracker)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()